@@ -0,0 +1,71 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from api.server import ARROW_MIME, DEFAULT_HOST, DEFAULT_PORT, JSON_ENDPOINTS
+"""
+API - Client
+
+Reads results from api.server and keeps the last response of every
+endpoint. Repeated reads send If-None-Match; on 304 the kept result is
+returned without downloading or parsing anything.
+
+    client = ResultsClient()
+    duplicates = client.get("/duplicate-issues")   # DataFrame
+    load = client.get("/inspection-load")          # dict
+
+Architectural rules:
+- No Streamlit imports
+- Returned frames are shared between calls and must be treated as read-only
+"""
+
+
+class ResultsClient:
+    def __init__(self, base_url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.not_modified = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+        # endpoint -> (etag, parsed result)
+        self._results = {}
+
+    def get(self, endpoint: str):
+        """
+        Current result of endpoint: a DataFrame for tables (read over
+        Arrow), a dict or list for the JSON endpoints.
+        """
+        table = endpoint not in JSON_ENDPOINTS
+        request = urllib.request.Request(self.base_url + endpoint)
+        request.add_header("Accept", ARROW_MIME if table else "application/json")
+
+        with self._lock:
+            cached = self._results.get(endpoint)
+        if cached is not None:
+            request.add_header("If-None-Match", cached[0])
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                etag = response.headers.get("ETag")
+                body = response.read()
+        except urllib.error.HTTPError as error:
+            if error.code == 304 and cached is not None:
+                with self._lock:
+                    self.not_modified += 1
+                return cached[1]
+            raise
+
+        if table:
+            import pyarrow as pa
+
+            result = pa.ipc.open_stream(io.BytesIO(body)).read_pandas()
+        else:
+            result = json.loads(body)
+
+        with self._lock:
+            self.downloads += 1
+            if etag:
+                self._results[endpoint] = (etag, result)
+        return result
@@ -0,0 +1,269 @@
+import argparse
+import hashlib
+import json
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from batch.run import DEFAULT_SOURCES, check_tables, plain_table
+from data.dataset import DatasetLoadError
+from data.result_cache import results
+from data.watcher import DatasetWatcher
+from logic.shopfloor_rules import calculate_inspection_load
+"""
+API - Local check results service
+
+Small HTTP service, run next to the Streamlit app, that serves the check
+results of the current exports. Results are computed once per version of
+the source files and serialized once per format, however many clients ask.
+
+Usage (from the repository root):
+    python -m api.server --port 8765
+
+Endpoints (GET):
+    /health                  200 once the first dataset is loaded
+    /version                 source fingerprints behind the results
+    /spools                  active spools (load_spools)
+    /duplicate-issues        duplicate active spools (_build_duplicate_issues)
+    /archive-conflicts       archived spools still marked completed
+    /operations1-checks      build_operations1_checks
+    /piping-manager-issues   spools with a High or Medium PM check
+    /piping-manager-summary  rows per PM severity / category / check
+    /station-summary         workbooks, red labels, witness and hold per station
+    /inspection-load         calculate_inspection_load (JSON only)
+
+Tables are JSON records by default, or an Arrow IPC stream with
+?format=arrow or "Accept: application/vnd.apache.arrow.stream".
+
+Every result carries a strong ETag derived from the content hashes of
+the source files, and "Cache-Control: no-cache" so clients revalidate.
+A request with a matching If-None-Match gets 304 without any work.
+
+Architectural rules:
+- No Streamlit imports
+- Read-only: GET only, no state changes through the API
+"""
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Bump when the content of a response changes for the same source files.
+RESULTS_VERSION = "1"
+
+JSON_MIME = "application/json"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+FORMATS = {"json": JSON_MIME, "arrow": ARROW_MIME}
+
+FIRST_LOAD_TIMEOUT = 120.0
+
+# Path -> result name.
+TABLE_ENDPOINTS = {
+    "/spools": "spools",
+    "/duplicate-issues": "duplicate_issues",
+    "/archive-conflicts": "archive_conflicts",
+    "/operations1-checks": "operations1_checks",
+    "/piping-manager-issues": "piping_manager_issues",
+    "/piping-manager-summary": "piping_manager_summary",
+    "/station-summary": "station_summary",
+}
+JSON_ENDPOINTS = {
+    "/version": "version",
+    "/inspection-load": "inspection_load",
+}
+
+
+def source_fingerprints(version: tuple) -> dict:
+    return {name: fingerprint for name, _, fingerprint in version}
+
+
+def result_etag(version: tuple, name: str, output_format: str) -> str:
+    key = json.dumps(
+        [RESULTS_VERSION, sorted(source_fingerprints(version).items()), name, output_format]
+    )
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in header.split(",")]
+
+
+# -----------------------------
+# RESULTS
+# -----------------------------
+def _json_body(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+def _table_body(df, output_format: str) -> bytes:
+    df = plain_table(df)
+    if output_format == "json":
+        return df.to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class CheckResults:
+    """
+    Results of one dataset version, computed on first request and
+    serialized once per (result, format).
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.version = dataset.version
+        self._lock = threading.Lock()
+        self._values = None
+        self._bodies = {}
+
+    def _compute(self) -> dict:
+        values = results.get_or_compute(self.version, "check_tables", (), lambda: check_tables(self.dataset))
+        values["spools"] = self.dataset.spools
+        values["inspection_load"] = calculate_inspection_load(self.dataset.spools)
+        values["version"] = source_fingerprints(self.version)
+        return values
+
+    def body(self, name: str, output_format: str) -> bytes:
+        key = (name, output_format)
+        with self._lock:
+            if key not in self._bodies:
+                if self._values is None:
+                    self._values = self._compute()
+                value = self._values[name]
+                if output_format == "json" and not hasattr(value, "columns"):
+                    self._bodies[key] = _json_body(value)
+                else:
+                    self._bodies[key] = _table_body(value, output_format)
+            return self._bodies[key]
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+class ResultsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, watcher: DatasetWatcher, verbose: bool = False):
+        super().__init__(address, ResultsHandler)
+        self.watcher = watcher
+        self.verbose = verbose
+        self._results = None
+        self._results_lock = threading.Lock()
+
+    def results(self) -> CheckResults:
+        """Results of the current dataset; waits only for the first load."""
+        dataset = self.watcher.wait_for_dataset(FIRST_LOAD_TIMEOUT)
+        with self._results_lock:
+            if self._results is None or self._results.version != dataset.version:
+                self._results = CheckResults(dataset)
+            return self._results
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    server_version = "SpoolResults/" + RESULTS_VERSION
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body: bytes = b"", content_type: str = JSON_MIME, headers: dict | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+
+    def _error(self, status, message: str):
+        self._send(status, _json_body({"error": message}))
+
+    def _output_format(self, query: dict) -> str | None:
+        requested = query.get("format", [None])[0]
+        if requested is None:
+            return "arrow" if ARROW_MIME in self.headers.get("Accept", "") else "json"
+        return requested if requested in FORMATS else None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+
+        if path == "/":
+            return self._send(HTTPStatus.OK, _json_body(sorted(list(TABLE_ENDPOINTS) + list(JSON_ENDPOINTS) + ["/health"])))
+
+        if path not in TABLE_ENDPOINTS and path not in JSON_ENDPOINTS and path != "/health":
+            return self._error(HTTPStatus.NOT_FOUND, f"Unknown endpoint {path}")
+
+        try:
+            results = self.server.results()
+        except TimeoutError:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, "Data sources are still loading.")
+        except (DatasetLoadError, OSError) as error:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(error))
+
+        if path == "/health":
+            return self._send(HTTPStatus.OK, _json_body({"status": "ok"}))
+
+        if path in TABLE_ENDPOINTS:
+            name = TABLE_ENDPOINTS[path]
+            output_format = self._output_format(parse_qs(url.query))
+            if output_format is None:
+                return self._error(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(FORMATS)}")
+        else:
+            name = JSON_ENDPOINTS[path]
+            output_format = "json"
+
+        etag = result_etag(results.version, name, output_format)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            return self._send(HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        body = results.body(name, output_format)
+        self._send(HTTPStatus.OK, body, FORMATS[output_format], headers)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the spool check results over local HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--spools", default=DEFAULT_SOURCES["spools"], help="file, directory or glob pattern")
+    parser.add_argument("--tasks", default=DEFAULT_SOURCES["tasks"], help="file, directory or glob pattern")
+    parser.add_argument("--piping-manager", default=DEFAULT_SOURCES["piping_manager"])
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    watcher = DatasetWatcher({
+        "spools": args.spools,
+        "tasks": args.tasks,
+        "piping_manager": args.piping_manager,
+    }).start()
+
+    server = ResultsServer((args.host, args.port), watcher, args.verbose)
+    print(f"Serving check results on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        watcher.stop(timeout=5)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
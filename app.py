@@ -1,12 +1,21 @@
-﻿import streamlit as st
-import pandas as pd
-
-from data.loader import load_spools
-from data.loader_tasks import load_tasks
-from data.loader_piping_manager import load_piping_manager_checks
+﻿import math
+from functools import partial
+
+import numpy as np
+import streamlit as st
+
+from data.dataset import DatasetLoadError
+from data.filter_index import FilterIndex
+from data.flow import StationFlowStore, flow_dir
+from data.history import SnapshotStore, history_dir
+from data.result_cache import cached, results
+from data.watcher import DatasetWatcher
+from data.search_index import SearchIndex, apply_search
+from data.sources import SOURCE_FILE_COLUMN
+from instrumentation import stages
 from layout.shopfloor import draw_shopfloor
-from ui.spool_detail import render_spool_detail
-from views.inspection import render_inspection
+from logic.piping_manager_checks import PM_ISSUE_COLUMNS, add_piping_manager_columns
+from logic.shopfloor_rules import workbooks_per_station
 
 
 # --------------------------------------------------
@@ -17,6 +26,8 @@ st.set_page_config(
     layout="wide"
 )
 
+stages.start_rerun("app")
+
 
 # --------------------------------------------------
 # CONSTANTS
@@ -29,41 +40,76 @@ STATUS_COLORS = {
     "completed": "#388e3c",
 }
 
+# Work Preparation filters (week selectbox, station buttons, status radio).
+FILTER_COLUMNS = ["start_year_week", "class_Station", "state"]
+
+# Rows per page of the Work Preparation table.
+TABLE_PAGE_SIZES = [100, 250, 500, 1000]
+
+# Plant -> departments. Plants without data sources are placeholders.
+PLANTS = {
+    "Carbon Steel": ["Work Preparation", "Inspection", "Station Flow"],
+    "Stainless Steel": ["Work Preparation", "Inspection", "Station Flow"],
+}
+DEFAULT_PLANT = "Stainless Steel"
+
+# Plant -> data sources. Each plant is loaded and watched separately.
+# spools and tasks may also be a directory or glob pattern of several
+# exports (one per project or hall), e.g. "exports/spools/*.xlsx".
+PLANT_DATA_SOURCES = {
+    "Stainless Steel": {
+        "spools": "spools.xlsx",
+        "tasks": "operations1_tasks.xlsx",
+        "piping_manager": "Piping manager-SCM_Weekly_Reporting.xlsx",
+    },
+}
+
 # --------------------------------------------------
 # HELPERS
 # --------------------------------------------------
-def style_rows(row):
-    color = STATUS_COLORS.get(row["state"])
-    if color:
-        return [f"color: {color}"] * len(row)
-    return [""] * len(row)
+def state_color_css(states):
+    # Text color CSS per row, mapped once per state instead of per row.
+    colors = states.map(STATUS_COLORS).astype(object)
+    return ("color: " + colors).fillna("").to_numpy(dtype=object)
 
 
-def apply_search(df, search_text):
-    if not search_text:
-        return df
+def style_state_colors(table, css):
+    return table.style.apply(
+        lambda frame: np.repeat(css[:, None], frame.shape[1], axis=1),
+        axis=None,
+    )
 
-    terms = [
-        t.strip().lower()
-        for t in search_text.replace(",", " ").split()
-        if t.strip()
-    ]
 
-    mask = pd.Series(False, index=df.index)
-
-    for term in terms:
-        term_mask = pd.Series(False, index=df.index)
-        for col in df.columns:
-            term_mask |= (
-                df[col]
-                .fillna("")
-                .astype(str)
-                .str.lower()
-                .str.contains(term, na=False)
-            )
-        mask |= term_mask
+def render_table_pager(row_count, key):
+    """
+    Page controls for a table of row_count rows.
+    Returns the (start, stop) row positions of the selected page.
+    """
+    page_size = st.session_state.get(f"{key}_page_size", TABLE_PAGE_SIZES[1])
+    pages = max(1, math.ceil(row_count / page_size))
 
-    return df[mask]
+    # Filters can shrink the table below the remembered page.
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    with col2:
+        st.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    start = (page - 1) * page_size
+    stop = min(start + page_size, row_count)
+    with col3:
+        st.caption(f"Rows {start + 1 if row_count else 0}-{stop} of {row_count}")
+
+    return start, stop
+
+
+def remember_selection(table_key, key, labels):
+    # Keeps the selected row (by index label) when the page changes.
+    rows = st.session_state[table_key].selection.rows
+    st.session_state[f"{key}_selected"] = labels[rows[0]] if rows else None
 
 
 def inject_status_radio_colors():
@@ -82,6 +128,81 @@ def inject_status_radio_colors():
     )
 
 
+# --------------------------------------------------
+# SHARED RESULTS
+# --------------------------------------------------
+# Computed once per data version (and filter values) for all sessions, see
+# data.result_cache. Returned frames are private shallow copies.
+@cached()
+def work_preparation_spools(dataset):
+    df = dataset.spools.copy()
+    df["id"] = df["id"].astype(str)
+
+    # FIX REVISION DISPLAY
+    df["var_ex_internal_rev"] = (
+        df["var_ex_internal_rev"]
+        .astype(str)
+        .str.split(".")
+        .str[0]
+        .str.zfill(3)
+    )
+
+    # TASK COUNT
+    df["task_count"] = dataset.task_index.task_count(df["id"])
+    return add_piping_manager_columns(df, dataset.piping_manager, dataset)
+
+
+@cached()
+def work_preparation_search_index(dataset):
+    return SearchIndex(work_preparation_spools(dataset))
+
+
+@cached()
+def station_workbook_counts(dataset):
+    # (workbooks, red label workbooks) per station.
+    df = work_preparation_spools(dataset)
+    return (
+        workbooks_per_station(df).to_dict(),
+        workbooks_per_station(df[df["is_red_label"]]).to_dict(),
+    )
+
+
+@cached()
+def week_options(dataset):
+    return get_week_options(work_preparation_spools(dataset))
+
+
+@cached()
+def work_preparation_filter_index(dataset):
+    return FilterIndex(work_preparation_spools(dataset), FILTER_COLUMNS)
+
+
+def filter_selection(dataset, week, station, status=None):
+    # Bitmap of the rows matching the week, station and status filters.
+    return work_preparation_filter_index(dataset).select({
+        "start_year_week": None if week == "All weeks" else week,
+        "class_Station": station,
+        "state": status,
+    })
+
+
+def status_counts(dataset, week, station):
+    return work_preparation_filter_index(dataset).counts(
+        "state", filter_selection(dataset, week, station)
+    )
+
+
+@cached()
+def filtered_spools(dataset, week, station, search_text, status):
+    df = work_preparation_filter_index(dataset).take(
+        work_preparation_spools(dataset),
+        filter_selection(dataset, week, station, status),
+    )
+    if search_text:
+        df = apply_search(df, search_text, work_preparation_search_index(dataset))
+    return df
+
+
 def get_week_options(df):
     week_rows = (
         df[df["start_year_week"] != "No start date"]
@@ -101,12 +222,47 @@ def get_week_options(df):
 
 # Upload mode is temporarily disabled. Keep this local-file helper so it can be
 # re-enabled later without changing the rest of the app.
-def get_data_sources():
-    return {
-        "spools": "spools.xlsx",
-        "tasks": "operations1_tasks.xlsx",
-        "piping_manager": "Piping manager-SCM_Weekly_Reporting.xlsx",
-    }
+def get_data_sources(plant):
+    return PLANT_DATA_SOURCES.get(plant)
+
+@st.cache_resource
+def get_watcher(data_sources):
+    # One background loader per set of data sources, shared by all sessions.
+    # New exports are parsed there; reruns only pick up the last good dataset.
+    # Every new spools export is also kept in the snapshot history and
+    # applied to the station flow.
+    history = history_dir(data_sources["spools"])
+    return DatasetWatcher(
+        data_sources,
+        history=SnapshotStore(history),
+        flow=StationFlowStore(flow_dir(history)),
+    ).start()
+
+
+def get_plant_dataset(data_sources):
+    watcher = get_watcher(data_sources)
+
+    try:
+        with st.spinner("Loading data..."):
+            dataset = watcher.wait_for_dataset()
+    except DatasetLoadError as error:
+        if any(isinstance(source_error, FileNotFoundError) for source_error in error.errors.values()):
+            st.error(
+                "Data files are missing. Upload the Operations1 spools export in the sidebar, "
+                "or place spools.xlsx in the app folder."
+            )
+        for name, source_error in error.errors.items():
+            st.error(f"{name}: {source_error}")
+        st.stop()
+
+    if watcher.error is not None:
+        st.warning(
+            f"The latest data export could not be loaded ({watcher.error}). "
+            "Showing the last good version."
+        )
+
+    return dataset
+
 
 def render_duplicate_metric(title, value, detail):
     st.metric(title, value, detail)
@@ -164,6 +320,7 @@ def render_duplicate_severity(df, duplicates, severity, expanded=False):
             )
 
 
+@stages.stage()
 def render_duplicate_review(df, duplicates):
     if duplicates.empty:
         return
@@ -194,115 +351,15 @@ def render_duplicate_review(df, duplicates):
     render_duplicate_severity(df, duplicates, "Medium", expanded=False)
     render_duplicate_severity(df, duplicates, "Low", expanded=False)
 
-def add_piping_manager_columns(df, pm_df):
-    result = df.copy()
-    pm_lookup = pm_df.set_index("var_ISOworkbookId")
-
-    result["pm_part_list_state"] = result["var_ISOworkbookId"].map(pm_lookup["pm_part_list_state"]).fillna("")
-    result["pm_av_ready_week"] = result["var_ISOworkbookId"].map(pm_lookup["pm_av_ready_week"]).fillna("")
-    result["pm_match_status"] = result["pm_part_list_state"].apply(
-        lambda value: "Matched" if value else "Missing in Piping Manager"
-    )
-
-    pm_checks = result.apply(evaluate_piping_manager_row, axis=1, result_type="expand")
-    result["pm_check_severity"] = pm_checks[0]
-    result["pm_check_category"] = pm_checks[1]
-    result["pm_check"] = pm_checks[2]
-    result["pm_action"] = pm_checks[3]
-
-    return result
-
-
-def evaluate_piping_manager_row(row):
-    state = str(row.get("pm_part_list_state", "")).strip()
-    station = str(row.get("class_Station", "")).strip()
-    mes_week = str(row.get("start_year_week", "")).strip()
-    pm_week = str(row.get("pm_av_ready_week", "")).strip()
-
-    if not state:
-        return (
-            "High",
-            "Missing in PM",
-            "Missing in Piping Manager",
-            "Workbook from Operations1 was not found in Piping Manager.",
-        )
-
-    if state == "5":
-        return (
-            "Medium",
-            "PM Hold",
-            "Part list on hold",
-            "Review hold status in Piping Manager.",
-        )
-
-    if state in {"15", "16"}:
-        if not pm_week:
-            return (
-                "High",
-                "AV Week Missing",
-                "Missing AV READY KW",
-                "Material tested/reserved, but Piping Manager AV READY KW is empty.",
-            )
-        if mes_week and mes_week != "No start date" and mes_week == pm_week:
-            return (
-                "OK",
-                "OK",
-                "Material tested/reserved - AV week OK",
-                "No action.",
-            )
-        return (
-            "Medium",
-            "AV Week Mismatch",
-            "AV week mismatch",
-            "Operations1 start week does not match Piping Manager AV READY KW.",
-        )
-
-    if state == "2":
-        if station == "Work Preparation":
-            return (
-                "Medium",
-                "Status/Station",
-                "Fully planned but still in Work Preparation",
-                "State 2 should be at PPS or past PPS, not Work Preparation.",
-            )
-        return (
-            "OK",
-            "OK",
-            "Fully planned - station OK",
-            "No action.",
-        )
-
-    return (
-        "OK",
-        "OK",
-        "No PM rule for this state",
-        "No action.",
-    )
-
-
 def render_pm_issue_rows(df, severity_rows, category, check, expanded=False):
     issue_rows = severity_rows[
         (severity_rows["pm_check_category"] == category)
         & (severity_rows["pm_check"] == check)
     ].copy()
 
-    pm_cols = [
-        "var_ISOworkbookId",
-        "var_ex_internal_rev",
-        "var_workBookType",
-        "state",
-        "class_Station",
-        "start_year_week",
-        "pm_part_list_state",
-        "pm_av_ready_week",
-        "pm_check_category",
-        "pm_check",
-        "pm_action",
-    ]
-
     title = f"{category} - {check} ({len(issue_rows)} rows)"
     with st.expander(title, expanded=expanded):
-        st.dataframe(issue_rows[pm_cols], use_container_width=True, hide_index=True)
+        st.dataframe(issue_rows[PM_ISSUE_COLUMNS], use_container_width=True, hide_index=True)
 
 
 def render_pm_severity(df, severity, expanded=False):
@@ -327,6 +384,7 @@ def render_pm_severity(df, severity, expanded=False):
             )
 
 
+@stages.stage()
 def render_piping_manager_check(df):
     pm_issue_rows = df[df["pm_check_severity"].isin(["High", "Medium"])]
     matched_count = int(df["pm_match_status"].eq("Matched").sum())
@@ -360,31 +418,20 @@ def render_piping_manager_check(df):
 # --------------------------------------------------
 # WORK PREPARATION VIEW
 # --------------------------------------------------
-def render_work_preparation(data_sources):
-    st.markdown("### Stainless Steel - Work Preparation")
+@stages.stage()
+def render_work_preparation(dataset, plant):
+    st.markdown(f"### {plant} - Work Preparation")
 
-    # LOAD DATA
-    df, duplicates, archive_conflicts = load_spools(data_sources["spools"])
-    tasks_df = load_tasks(data_sources["tasks"])
-    pm_df = load_piping_manager_checks(data_sources["piping_manager"])
+    # Widget and session state keys are per plant, so filters and the
+    # selected row of one plant never apply to another plant's spools.
+    key = f"wp_{plant}"
 
-    df = df.copy()
-    df["id"] = df["id"].astype(str)
-    tasks_df["order_id"] = tasks_df["order_id"].astype(str)
+    # DATA (shared, read-only)
+    duplicates = dataset.duplicates
+    archive_conflicts = dataset.archive_conflicts
+    task_index = dataset.task_index
 
-    # FIX REVISION DISPLAY
-    df["var_ex_internal_rev"] = (
-        df["var_ex_internal_rev"]
-        .astype(str)
-        .str.split(".")
-        .str[0]
-        .str.zfill(3)
-    )
-
-    # TASK COUNT
-    task_counts = tasks_df.groupby("order_id").size().to_dict()
-    df["task_count"] = df["id"].map(task_counts).fillna(0).astype(int)
-    df = add_piping_manager_columns(df, pm_df)
+    df = work_preparation_spools(dataset)
 
     # WARNINGS
     render_duplicate_review(df, duplicates)
@@ -395,85 +442,70 @@ def render_work_preparation(data_sources):
         st.dataframe(archive_conflicts, use_container_width=True)
 
     # SHOPFLOOR COUNTS
-    spool_counts = (
-        df.groupby("class_Station")["var_ISOworkbookId"]
-        .nunique()
-        .to_dict()
-    )
-
-    red_label_counts = (
-        df[df["is_red_label"]]
-        .groupby("class_Station")["var_ISOworkbookId"]
-        .nunique()
-        .to_dict()
-    )
+    spool_counts, red_label_counts = station_workbook_counts(dataset)
 
-    draw_shopfloor(spool_counts, red_label_counts)
+    draw_shopfloor(spool_counts, red_label_counts, key)
 
     # WEEK FILTER
     week_filter = st.selectbox(
         "Production week",
-        get_week_options(df),
-        key="week_wp",
+        week_options(dataset),
+        key=f"week_{key}",
     )
 
-    if week_filter != "All weeks":
-        df = df[df["start_year_week"] == week_filter].copy()
-
     # FILTER BY STATION
-    if "selected_station" in st.session_state:
-        df_view = df[df["class_Station"] == st.session_state.selected_station]
-        st.markdown(f"#### Spools at station: **{st.session_state.selected_station}**")
+    selected_station = st.session_state.get(f"{key}_selected_station")
+    if selected_station is not None:
+        st.markdown(f"#### Spools at station: **{selected_station}**")
     else:
-        df_view = df.copy()
         st.markdown("#### All active spools")
 
     # SEARCH
     search_text = st.text_input(
         "Search",
         placeholder="Examples: ISO123, Q2 II, Welding, Red label, in-progress",
-        key="search_wp"
+        key=f"search_{key}",
     )
 
     inject_status_radio_colors()
 
     # STATUS FILTER WITH COUNTS
-    status_counts = df_view["state"].value_counts().to_dict()
+    counts = status_counts(dataset, week_filter, selected_station)
     statuses = ["All"] + [
-        f"{s} ({status_counts.get(s, 0)})"
-        for s in sorted(status_counts.keys())
+        f"{s} ({counts.get(s, 0)})"
+        for s in sorted(counts.keys())
     ]
 
     status_filter = st.radio(
         "Filter by status",
         statuses,
         horizontal=True,
-        key="status_wp"
+        key=f"status_{key}",
     )
 
-    df_filtered = apply_search(df_view, search_text)
-
-    if status_filter != "All":
-        status_name = status_filter.split(" (")[0]
-        df_filtered = df_filtered[df_filtered["state"] == status_name]
+    status_name = status_filter.split(" (")[0] if status_filter != "All" else None
+    df_filtered = filtered_spools(dataset, week_filter, selected_station, search_text, status_name)
 
 
     # SORT OPTIONS
     with st.expander("Sort options"):
         sort_primary = st.selectbox(
             "Primary sort",
-            ["None", "start_year_week", "label_type", "class_Station", "state", "task_count"]
+            ["None", "start_year_week", "label_type", "class_Station", "state", "task_count"],
+            key=f"sort_primary_{key}",
         )
 
         sort_secondary = st.selectbox(
             "Secondary sort",
-            ["None", "start_year_week", "class_Station", "label_type", "state", "task_count"]
+            ["None", "start_year_week", "class_Station", "label_type", "state", "task_count"],
+            key=f"sort_secondary_{key}",
         )
 
         sort_order = st.radio(
             "Order",
             ["Ascending", "Descending"],
-            horizontal=True
+            horizontal=True,
+            key=f"sort_order_{key}",
         )
 
     sort_cols = []
@@ -505,67 +537,81 @@ def render_work_preparation(data_sources):
         "start_year_week",
         "task_count",
     ]
-
-    table = st.dataframe(
-        df_filtered[table_cols]
-        .style
-        .apply(style_rows, axis=1),
-        use_container_width=True,
-        hide_index=True,
-        selection_mode="single-row",
-        on_select="rerun",
-    )
+    # Export file of each row when spools come from several exports.
+    if SOURCE_FILE_COLUMN in df_filtered.columns:
+        table_cols.append(SOURCE_FILE_COLUMN)
+
+    # Only the current page is styled and sent to the browser.
+    start, stop = render_table_pager(len(df_filtered), key)
+    df_page = df_filtered.iloc[start:stop]
+    table_key = f"{key}_table_{start}_{stop}"
+
+    with stages.measure("work_preparation_table", len(df_page)):
+        st.dataframe(
+            style_state_colors(df_page[table_cols], state_color_css(df_page["state"])),
+            use_container_width=True,
+            hide_index=True,
+            selection_mode="single-row",
+            key=table_key,
+            on_select=partial(remember_selection, table_key, key, df_page.index),
+        )
 
     # DETAIL VIEW
-    if table.selection.rows:
-        idx = table.selection.rows[0]
-        spool_row = df_filtered.iloc[idx]
+    selected = st.session_state.get(f"{key}_selected")
+    if selected is not None and selected in df_filtered.index:
+        spool_row = df_filtered.loc[selected]
 
         selected_id = spool_row["id"]
-        spool_tasks = tasks_df[tasks_df["order_id"] == selected_id]
+        spool_tasks = task_index.tasks_for(selected_id)
 
         st.markdown("---")
+        from ui.spool_detail import render_spool_detail
+
         render_spool_detail(spool_row, spool_tasks)
 
 # --------------------------------------------------
-# TABS
+# PLANT / DEPARTMENT NAVIGATION
 # --------------------------------------------------
-plant_tabs = st.tabs([
-    "Carbon Steel",
-    "Stainless Steel"
-])
-
-data_sources = get_data_sources()
-
-try:
-    inspection_df, _, _ = load_spools(data_sources["spools"])
-except FileNotFoundError:
-    st.error(
-        "Data files are missing. Upload the Operations1 spools export in the sidebar, "
-        "or place spools.xlsx in the app folder."
-    )
-    st.stop()
-
-
-with plant_tabs[0]:
-    st.info("Carbon Steel views not enabled yet.")
-
-with plant_tabs[1]:
-    dept_tabs = st.tabs([
-        "Work Preparation",
-        "Inspection"
-    ])
-
-    with dept_tabs[0]:
-        render_work_preparation(data_sources)
-
-    with dept_tabs[1]:
-        render_inspection(inspection_df)
+# Only the selected view runs, and a plant's data is loaded the first time
+# the plant is opened. Views other than Work Preparation are imported when
+# first selected, so a new server process only pays for the default view.
+plant = st.radio(
+    "Plant",
+    list(PLANTS),
+    index=list(PLANTS).index(DEFAULT_PLANT),
+    horizontal=True,
+    key="plant",
+    label_visibility="collapsed",
+)
 
+data_sources = get_data_sources(plant)
 
+if data_sources is None:
+    st.info(f"{plant} views not enabled yet.")
+else:
+    department = st.radio(
+        "Department",
+        PLANTS[plant],
+        horizontal=True,
+        key=f"department_{plant}",
+        label_visibility="collapsed",
+    )
 
+    dataset = get_plant_dataset(data_sources)
 
+    if department == "Work Preparation":
+        render_work_preparation(dataset, plant)
+    elif department == "Inspection":
+        from views.inspection import render_inspection
 
+        render_inspection(dataset.spools)
+    elif department == "Station Flow":
+        from views.station_flow import render_station_flow
 
+        render_station_flow(get_watcher(data_sources).flow)
 
+run = stages.finish_rerun()
+if run is not None:
+    from ui.debug_panel import render_debug_panel
 
+    render_debug_panel(run, results.stats())
@@ -0,0 +1,237 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from data.dataset import DatasetLoadError, load_dataset
+from data.sources import is_multi_file, source_files
+from logic.operations1_checks import build_operations1_checks
+from logic.piping_manager_checks import PM_ISSUE_COLUMNS, add_piping_manager_columns
+from logic.shopfloor_rules import STATIONS, calculate_inspection_load, workbooks_per_station
+"""
+BATCH - Headless check run
+
+Runs the full check pipeline on one set of exports without Streamlit, for
+cron jobs and CI:
+
+    load_spools, load_tasks, load_piping_manager_checks (load_dataset)
+    -> Piping Manager merge and checks
+    -> build_operations1_checks
+    -> calculate_inspection_load
+
+and writes the issue tables and station aggregates to an output directory.
+
+Usage (from the repository root):
+    python -m batch.run --output checks/
+    python -m batch.run --spools export/spools.xlsx --format parquet csv --fail-on High
+    python -m batch.run --spools "exports/*/spools*.xlsx" --tasks exports/tasks/
+
+Spools and tasks may be a file, a directory or a glob pattern (quoted);
+the files of one source are read in parallel and checked together.
+
+Outputs (one file per table and format):
+    duplicate_issues        duplicate active spools (per workbook)
+    archive_conflicts       archived spools still marked completed
+    operations1_checks      Operations1 identity / status / duplicate checks
+    piping_manager_issues   spools with a High or Medium PM check
+    piping_manager_summary  row counts per PM severity / category / check
+    station_summary         workbooks, red label workbooks and inspection
+                            load (witness / hold) per station
+    summary.json            row counts, source files and timings
+
+Exit codes: 0 ok, 1 issues at or above --fail-on, 2 sources not loadable.
+
+Architectural rules:
+- No Streamlit imports (directly or through views / ui / layout)
+"""
+
+
+DEFAULT_SOURCES = {
+    "spools": "spools.xlsx",
+    "tasks": "operations1_tasks.xlsx",
+    "piping_manager": "Piping manager-SCM_Weekly_Reporting.xlsx",
+}
+
+FORMATS = ["parquet", "csv", "json"]
+SEVERITIES = ["High", "Medium", "Low"]
+
+
+# -----------------------------
+# PIPELINE
+# -----------------------------
+def build_station_summary(spools: pd.DataFrame) -> pd.DataFrame:
+    inspection_load = calculate_inspection_load(spools)
+
+    summary = pd.DataFrame(index=pd.Index(STATIONS, name="station"))
+    summary["workbooks"] = workbooks_per_station(spools)
+    summary["red_label_workbooks"] = workbooks_per_station(spools[spools["is_red_label"]])
+    summary = summary.fillna(0).astype(int)
+    summary["witness"] = [inspection_load[station]["WITNESS"] for station in STATIONS]
+    summary["hold"] = [inspection_load[station]["HOLD"] for station in STATIONS]
+
+    return summary.reset_index()
+
+
+def _timed(timings: dict | None, name: str, step):
+    start = time.perf_counter()
+    result = step()
+    if timings is not None:
+        timings[name] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def check_tables(dataset, timings: dict | None = None) -> dict:
+    """
+    Output tables by name for a loaded SpoolDataset. Step wall times (in
+    seconds) are added to timings when given.
+    """
+    spools = dataset.spools.copy()
+    spools["task_count"] = dataset.task_index.task_count(spools["id"].astype(str))
+    checked = _timed(
+        timings,
+        "piping_manager_checks",
+        lambda: add_piping_manager_columns(spools, dataset.piping_manager),
+    )
+    operations1 = _timed(timings, "operations1_checks", lambda: build_operations1_checks(dataset.spools))
+    stations = _timed(timings, "station_summary", lambda: build_station_summary(dataset.spools))
+
+    pm_issues = checked.loc[
+        checked["pm_check_severity"].isin(["High", "Medium"]),
+        ["pm_check_severity"] + PM_ISSUE_COLUMNS,
+    ]
+    pm_summary = (
+        checked.groupby(["pm_check_severity", "pm_check_category", "pm_check"])
+        .size()
+        .reset_index(name="rows")
+        .sort_values(["pm_check_severity", "rows"], ascending=[True, False])
+    )
+
+    return {
+        "duplicate_issues": dataset.duplicates,
+        "archive_conflicts": dataset.archive_conflicts,
+        "operations1_checks": operations1,
+        "piping_manager_issues": pm_issues,
+        "piping_manager_summary": pm_summary,
+        "station_summary": stations,
+    }
+
+
+def run_checks(data_sources: dict) -> tuple:
+    """
+    Returns (tables, timings): the output tables by name and the wall time
+    of each step in seconds.
+    """
+    timings = {}
+    dataset = _timed(timings, "load", lambda: load_dataset(data_sources))
+    return check_tables(dataset, timings), timings
+
+
+def count_issues(tables: dict, fail_on: str) -> int:
+    """Issues with severity fail_on or worse over all issue tables."""
+    severities = set(SEVERITIES[:SEVERITIES.index(fail_on) + 1])
+    return int(
+        tables["duplicate_issues"]["severity"].isin(severities).sum()
+        + tables["operations1_checks"]["severity"].isin(severities).sum()
+        + tables["piping_manager_issues"]["pm_check_severity"].isin(severities).sum()
+    )
+
+
+# -----------------------------
+# OUTPUT
+# -----------------------------
+def plain_table(df: pd.DataFrame) -> pd.DataFrame:
+    # Categoricals and mixed object columns as text, so every format
+    # (and every reader of it) sees the same values.
+    df = df.reset_index(drop=True)
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype) or df[column].dtype == object:
+            df[column] = df[column].astype(str).where(df[column].notna(), None)
+    return df
+
+
+def write_table(df: pd.DataFrame, directory: Path, name: str, formats: list) -> list:
+    df = plain_table(df)
+    written = []
+    for output_format in formats:
+        path = directory / f"{name}.{output_format}"
+        if output_format == "parquet":
+            df.to_parquet(path, index=False)
+        elif output_format == "csv":
+            df.to_csv(path, index=False, encoding="utf-8-sig")
+        else:
+            df.to_json(path, orient="records", force_ascii=False, indent=1, date_format="iso")
+        written.append(path.name)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the spool checks without the Streamlit app.")
+    parser.add_argument("--spools", default=DEFAULT_SOURCES["spools"], help="file, directory or glob pattern")
+    parser.add_argument("--tasks", default=DEFAULT_SOURCES["tasks"], help="file, directory or glob pattern")
+    parser.add_argument("--piping-manager", default=DEFAULT_SOURCES["piping_manager"])
+    parser.add_argument("--output", default="checks", help="output directory")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["parquet"])
+    parser.add_argument(
+        "--fail-on",
+        choices=SEVERITIES,
+        help="exit with 1 when any issue has this severity or worse",
+    )
+    args = parser.parse_args(argv)
+
+    data_sources = {
+        "spools": args.spools,
+        "tasks": args.tasks,
+        "piping_manager": args.piping_manager,
+    }
+
+    try:
+        tables, timings = run_checks(data_sources)
+    except DatasetLoadError as error:
+        for name, source_error in error.errors.items():
+            print(f"{name}: {source_error}", file=sys.stderr)
+        return 2
+    except OSError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    for name, table in tables.items():
+        files[name] = write_table(table, output, name, args.format)
+
+    summary = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "sources": {name: str(Path(path).resolve()) for name, path in data_sources.items()},
+        "source_files": {
+            name: list(source_files(path))
+            for name, path in data_sources.items()
+            if is_multi_file(path)
+        },
+        "rows": {name: len(table) for name, table in tables.items()},
+        "timings": timings,
+        "files": files,
+    }
+    if args.fail_on:
+        summary["fail_on"] = args.fail_on
+        summary["failing_issues"] = count_issues(tables, args.fail_on)
+
+    with open(output / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+
+    for name, rows in summary["rows"].items():
+        print(f"{name:<24} {rows:>8}")
+
+    if args.fail_on and summary["failing_issues"]:
+        print(f"{summary['failing_issues']} issues at {args.fail_on} or worse", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
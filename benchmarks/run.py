@@ -0,0 +1,220 @@
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_dataset
+from data.cache import CACHE_DIR_NAME
+from data.filter_index import FilterIndex
+from data.loader import _build_duplicate_issues, load_spools
+from data.loader_piping_manager import load_piping_manager_checks
+from data.loader_tasks import load_tasks
+from data.search_index import SearchIndex, apply_search
+from logic.operations1_checks import build_operations1_checks
+from logic.piping_manager_checks import add_piping_manager_columns
+from logic.shopfloor_rules import calculate_inspection_load
+"""
+BENCHMARKS - Stage timings
+
+Generates synthetic source files at one or more scales and times every
+stage of the data pipeline on them. Results are written as JSON so runs of
+different versions can be compared (--baseline).
+
+Usage (from the repository root):
+    python -m benchmarks.run --scale 1 10 --repeat 3 --output bench.json
+    python -m benchmarks.run --scale 10 --baseline bench.json
+
+Loader stages are timed cold (columnar cache removed before every run) and
+warm ("(cached)").
+
+Architectural rules:
+- No Streamlit imports
+"""
+
+
+SEARCH_QUERY = "SW Q2 welding"
+FILTER_COLUMNS = ["start_year_week", "class_Station", "state"]
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _summary(runs: list) -> dict:
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "max": max(runs),
+        "runs": runs,
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(scale: float, directory: Path, repeat: int = 3, seed: int = 0) -> dict:
+    sources = generate_dataset(directory, scale, seed)
+    stages = {}
+
+    def measure(name, stage, setup=None):
+        runs = []
+        result = None
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = stage()
+            runs.append(time.perf_counter() - start)
+        stages[name] = _summary(runs)
+        return result
+
+    def clear_cache():
+        shutil.rmtree(directory / CACHE_DIR_NAME, ignore_errors=True)
+
+    # -----------------------------
+    # LOADERS
+    # -----------------------------
+    spools, _, _ = measure("load_spools", lambda: load_spools(sources["spools"]), clear_cache)
+    measure("load_spools (cached)", lambda: load_spools(sources["spools"]))
+    tasks = measure("load_tasks", lambda: load_tasks(sources["tasks"]), clear_cache)
+    measure("load_tasks (cached)", lambda: load_tasks(sources["tasks"]))
+    pm_df = measure(
+        "load_piping_manager_checks",
+        lambda: load_piping_manager_checks(sources["piping_manager"]),
+        clear_cache,
+    )
+    measure(
+        "load_piping_manager_checks (cached)",
+        lambda: load_piping_manager_checks(sources["piping_manager"]),
+    )
+
+    # -----------------------------
+    # CHECKS
+    # -----------------------------
+    measure("_build_duplicate_issues", lambda: _build_duplicate_issues(spools))
+    measure("build_operations1_checks", lambda: build_operations1_checks(spools))
+    prepared = measure("add_piping_manager_columns", lambda: add_piping_manager_columns(spools, pm_df))
+    measure("calculate_inspection_load", lambda: calculate_inspection_load(spools))
+
+    # -----------------------------
+    # SEARCH
+    # -----------------------------
+    measure("apply_search", lambda: apply_search(prepared, SEARCH_QUERY))
+    index = measure("SearchIndex", lambda: SearchIndex(prepared))
+    measure("apply_search (index)", lambda: apply_search(prepared, SEARCH_QUERY, index))
+
+    # -----------------------------
+    # FILTERS
+    # -----------------------------
+    # Most common week and station, status counts of that view.
+    week = prepared["start_year_week"].mode().iloc[0]
+    station = prepared["class_Station"].mode().iloc[0]
+
+    def scan_filters():
+        view = prepared[(prepared["start_year_week"] == week) & (prepared["class_Station"] == station)]
+        counts = view["state"].value_counts()
+        return view, counts[counts > 0].to_dict()
+
+    def index_filters():
+        bitmap = filters.select({"start_year_week": week, "class_Station": station})
+        return filters.take(prepared, bitmap), filters.counts("state", bitmap)
+
+    measure("filters (scan)", scan_filters)
+    filters = measure("FilterIndex", lambda: FilterIndex(prepared, FILTER_COLUMNS))
+    measure("filters (index)", index_filters)
+
+    return {
+        "scale": scale,
+        "rows": {
+            "spools": len(spools),
+            "tasks": len(tasks),
+            "piping_manager": len(pm_df),
+        },
+        "stages": stages,
+    }
+
+
+def run(scales: list, repeat: int = 3, seed: int = 0, data_dir=None) -> dict:
+    results = []
+    for scale in scales:
+        if data_dir is None:
+            with tempfile.TemporaryDirectory(prefix="spool-bench-") as directory:
+                results.append(run_scale(scale, Path(directory), repeat, seed))
+        else:
+            results.append(run_scale(scale, Path(data_dir) / f"scale-{scale:g}", repeat, seed))
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """
+    (scale, stage, baseline median, current median, ratio) for every stage
+    present in both reports. ratio > 1 means the current run is slower.
+    """
+    previous = {result["scale"]: result["stages"] for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = previous.get(result["scale"], {})
+        for stage, timing in result["stages"].items():
+            if stage in before:
+                old, new = before[stage]["median"], timing["median"]
+                rows.append((result["scale"], stage, old, new, new / old if old else float("inf")))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time the spool data pipeline on synthetic data.")
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0], help="multiples of today's export sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep the generated workbooks here instead of a temporary folder")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.scale, args.repeat, args.seed, args.data_dir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for scale, stage, old, new, ratio in compare(baseline, report):
+            print(f"x{scale:g}  {stage:<38} {old:9.4f}s -> {new:9.4f}s  {ratio:6.2f}x", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
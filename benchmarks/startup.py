@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.run import _commit, _summary, compare
+from benchmarks.synthetic import generate_dataset
+from data.history import HISTORY_DIR_NAME
+from data.sources import EXCEL_SUFFIXES
+"""
+BENCHMARKS - Cold start
+
+Times fresh Python processes, so nothing is shared with earlier runs:
+
+    python                      empty interpreter (baseline)
+    import compute              data.* and logic.* modules the app and the
+                                batch run use; must not import streamlit
+    import streamlit            what every server process pays up front
+    first render (cold cache)   first run of app.py in a fresh process, no
+                                columnar cache or history yet
+    first render (warm cache)   the same with the cache of a previous start
+
+The app runs through streamlit.testing (AppTest), which executes the
+script like the server does for a first session, without the browser
+round trip. Every measurement is the wall time of the whole process; the
+app measurements also record the script run alone ("... script").
+
+The app always runs in a temporary folder. With --data-dir the workbooks
+of that folder are copied there; its cache and history are neither copied
+nor touched.
+
+Usage (from the repository root):
+    python -m benchmarks.startup --repeat 5 --output startup.json
+    python -m benchmarks.startup --baseline startup.json
+
+Architectural rules:
+- No Streamlit imports in this process (only in the measured children)
+"""
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMPUTE_MODULES = [
+    "data.dataset",
+    "data.watcher",
+    "data.search_index",
+    "logic.operations1_checks",
+    "logic.piping_manager_checks",
+    "logic.shopfloor_rules",
+    "logic.station_flow",
+    "batch.run",
+]
+
+COMPUTE_CODE = f"""
+import sys
+import {", ".join(COMPUTE_MODULES)}
+assert not any(name.split(".")[0] == "streamlit" for name in sys.modules), "compute path imported streamlit"
+"""
+
+APP_CODE = f"""
+import json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({str(ROOT / "app.py")!r}, default_timeout=600)
+app.run()
+print(json.dumps({{"script": time.perf_counter() - start, "exceptions": [e.value for e in app.exception]}}))
+"""
+
+CASES = {
+    "python": "pass",
+    "import compute": COMPUTE_CODE,
+    "import streamlit": "import streamlit",
+    "first render (cold cache)": APP_CODE,
+    "first render (warm cache)": APP_CODE,
+}
+
+
+def _run_child(code: str, cwd: Path) -> tuple:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.pop("SPOOL_INSTRUMENTATION", None)
+
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "child failed")
+    output = completed.stdout.strip().splitlines()
+    return elapsed, json.loads(output[-1]) if output else {}
+
+
+def _copy_workbooks(source: Path, target: Path) -> int:
+    """
+    Copy the Excel files of source (subfolders included) to the same
+    relative paths under target. Hidden folders (the columnar cache) and
+    the snapshot history are skipped. Returns the number of files copied.
+    """
+    copied = 0
+    for folder, subfolders, files in os.walk(source):
+        subfolders[:] = [name for name in subfolders if not name.startswith(".") and name != HISTORY_DIR_NAME]
+        for name in files:
+            if Path(name).suffix.lower() not in EXCEL_SUFFIXES or name.startswith("~$"):
+                continue
+            destination = target / Path(folder).relative_to(source) / name
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(Path(folder) / name, destination)
+            copied += 1
+    return copied
+
+
+def _clear_app_state(directory: Path) -> None:
+    # Columnar cache and snapshot history a previous start left behind in
+    # the benchmark's own folder.
+    for name in [".spool_cache", HISTORY_DIR_NAME]:
+        shutil.rmtree(directory / name, ignore_errors=True)
+
+
+def run_startup(directory: Path, repeat: int = 5) -> dict:
+    """
+    Time every case with directory as the working directory. directory is
+    a scratch folder owned by the benchmark: its cache and history are
+    removed before every cold start.
+    """
+    # The app reads its images relative to the working directory. A copy,
+    # not a symlink, so this works on Windows without extra privileges.
+    if not (directory / "assets").exists():
+        shutil.copytree(ROOT / "assets", directory / "assets")
+
+    stages = {}
+
+    for name, code in CASES.items():
+        runs = []
+        script_runs = []
+        for _ in range(repeat):
+            if name == "first render (cold cache)":
+                _clear_app_state(directory)
+            elapsed, result = _run_child(code, directory)
+            if result.get("exceptions"):
+                raise RuntimeError(f"{name}: {result['exceptions'][0]}")
+            runs.append(elapsed)
+            if "script" in result:
+                script_runs.append(result["script"])
+
+        stages[name] = _summary(runs)
+        if script_runs:
+            stages[f"{name} script"] = _summary(script_runs)
+
+    return {"scale": 1.0, "stages": stages}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time process start, compute imports and the app's first render.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="folder with the source workbooks, copied first (default: synthetic, scale 1)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="spool-startup-") as temporary:
+        directory = Path(temporary)
+        if args.data_dir:
+            if not _copy_workbooks(Path(args.data_dir), directory):
+                parser.error(f"no Excel workbooks found in {args.data_dir}")
+        else:
+            generate_dataset(directory, 1.0, args.seed)
+        result = run_startup(directory, args.repeat)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": [result],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for stage, timing in result["stages"].items():
+        print(f"{stage:<36} {timing['median']:8.3f}s (min {timing['min']:.3f}s)", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        for _, stage, old, new, ratio in compare(baseline, report):
+            print(f"{stage:<36} {old:8.3f}s -> {new:8.3f}s  {ratio:6.2f}x", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from logic.shopfloor_rules import STATIONS
+"""
+BENCHMARKS - Synthetic data
+
+Writes MES spools, Operations1 tasks and Piping Manager workbooks with the
+same sheets, headers and value shapes as the real exports, at any size.
+
+Sizes are given as a scale factor of BASE_ROWS (roughly today's exports).
+The same seed and scale always produce the same files.
+
+Architectural rules:
+- No Streamlit imports
+- Only headers the loaders accept (see COLUMN_ALIASES, TASK_COLUMNS,
+  PM_COLUMNS) plus the unused columns of the real exports
+"""
+
+
+BASE_ROWS = {
+    "spools": 1600,
+    "tasks": 650,
+    "piping_manager": 1250,
+}
+
+SPOOLS_FILE = "spools.xlsx"
+TASKS_FILE = "operations1_tasks.xlsx"
+PIPING_MANAGER_FILE = "Piping manager-SCM_Weekly_Reporting.xlsx"
+
+# Header row of the MES export, in export order.
+SPOOL_HEADERS = [
+    "order_id",
+    "name",
+    "state",
+    "archived",
+    "start date",
+    "ISOworkbookId",
+    "STL_WORK_PACKAGE",
+    "ex_akz_kks",
+    "ex_internal_rev",
+    "isometric",
+    "spool",
+    "workBookType",
+    "class_Issuer",
+    "class_Pressure Risk Category",
+    "class_Quality class",
+    "class_Station",
+]
+
+TASK_HEADERS = [
+    "order_id",
+    "report_id",
+    "task_name",
+    "task_description",
+    "state",
+    "assigned_Groups",
+]
+
+# (value, weight) pairs, weights taken from the real exports.
+SPOOL_STATES = [
+    ("in-progress", 650),
+    ("cancelled", 500),
+    ("in-edit", 265),
+    ("done", 145),
+    ("not-started", 55),
+    ("scheduled", 4),
+    ("problem", 4),
+    ("paused", 3),
+]
+SPOOL_TYPES = [
+    ("(SW)", 1030),
+    ("(KRB m.)", 300),
+    ("(TK)", 60),
+    ("(KRB o.)", 25),
+    ("Welding (SW) only", 18),
+    ("Cold bending (KRB m.) with welding", 15),
+    ("(IRB m.)", 2),
+]
+QUALITY_CLASSES = [("Q3", 660), ("NR", 630), ("Q2", 240), ("Q1", 20), (None, 100)]
+PRESSURE_RISKS = [("0", 680), ("I", 650), ("III", 45), ("II", 35), (None, 220)]
+TASK_STATES = [("done", 340), ("not-started", 300), ("cancelled", 7), ("in-progress", 3)]
+TASK_NAMES = [
+    "Sign",
+    "Document missing",
+    "Data issue",
+    "Re issue",
+    "DC1 report missing",
+    "Decimal place missing",
+    "painting spec missing",
+]
+TASK_GROUPS = [
+    [],
+    [{"id": 19, "name": "IT Support"}],
+    [{"id": 21, "name": "Controller"}],
+    [{"id": 90, "name": "AV - Work preparation"}],
+    [{"id": 26, "name": "NDT-Supervisor"}],
+    [{"id": 28, "name": "QA Inspector"}, {"id": 87, "name": "QA NCR"}],
+]
+PART_LIST_STATES = [("15", 40), ("16", 25), ("2", 20), ("5", 5), ("10", 10)]
+
+START_DATES = pd.date_range("2026-03-02", "2026-09-28", freq="D")
+
+
+def _choice(rng, weighted, size):
+    values = np.empty(len(weighted), dtype=object)
+    values[:] = [value for value, _ in weighted]
+    weights = np.array([weight for _, weight in weighted], dtype=float)
+    return rng.choice(values, size=size, p=weights / weights.sum())
+
+
+def _rows(scale: float, name: str) -> int:
+    return max(1, int(round(BASE_ROWS[name] * scale)))
+
+
+def synthetic_spools(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    MES orders: every ISO workbook has one to three rows (revisions and
+    re-issued orders), a share of rows is archived and some rows are not
+    spools at all (no ISO workbook id), as in the real export.
+    """
+    rng = np.random.default_rng(seed)
+
+    workbook_count = max(1, rows * 2 // 3)
+    workbooks = 200000 + rng.choice(workbook_count * 4, size=workbook_count, replace=False)
+    workbook_ids = workbooks[rng.integers(0, workbook_count, size=rows)].astype(object)
+    workbook_ids[rng.random(rows) < 0.03] = None
+
+    revisions = rng.integers(0, 4, size=rows).astype(object)
+    spool_types = _choice(rng, SPOOL_TYPES, rows)
+    red_label = rng.random(rows) < 0.1
+    spool_no = rng.integers(1, 6, size=rows)
+    names = [
+        f"SPL {number} | {spool_type}" + (" Red label" if red else "")
+        for number, spool_type, red in zip(spool_no, spool_types, red_label)
+    ]
+
+    start_dates = rng.choice(START_DATES, size=rows) + pd.to_timedelta(4, unit="h")
+    stations = _choice(rng, [(station, 10) for station in STATIONS] + [(None, 3)], rows)
+
+    return pd.DataFrame({
+        "order_id": np.arange(1, rows + 1) + 1000,
+        "name": names,
+        "state": _choice(rng, SPOOL_STATES, rows),
+        "archived": rng.random(rows) < 0.33,
+        "start date": pd.DatetimeIndex(start_dates).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "ISOworkbookId": workbook_ids,
+        "STL_WORK_PACKAGE": [f"WP-{value:03d}" for value in rng.integers(1, 400, size=rows)],
+        "ex_akz_kks": [f"1LBA{value:02d}BR{value * 7 % 900:03d}" for value in rng.integers(1, 99, size=rows)],
+        "ex_internal_rev": revisions,
+        "isometric": [None if value is None else f"ISO-{value}" for value in workbook_ids],
+        "spool": spool_no,
+        "workBookType": spool_types,
+        "class_Issuer": "Engineering",
+        "class_Pressure Risk Category": _choice(rng, PRESSURE_RISKS, rows),
+        "class_Quality class": _choice(rng, QUALITY_CLASSES, rows),
+        "class_Station": stations,
+    }, columns=SPOOL_HEADERS)
+
+
+def synthetic_tasks(rows: int, order_ids, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed + 1)
+    groups = np.empty(len(TASK_GROUPS), dtype=object)
+    groups[:] = [json.dumps(group) for group in TASK_GROUPS]
+
+    return pd.DataFrame({
+        "order_id": rng.choice(np.asarray(order_ids), size=rows),
+        "report_id": 54000 + np.arange(rows),
+        "task_name": rng.choice(TASK_NAMES, size=rows),
+        "task_description": "-",
+        "state": _choice(rng, TASK_STATES, rows),
+        "assigned_Groups": rng.choice(groups, size=rows),
+    }, columns=TASK_HEADERS)
+
+
+def synthetic_piping_manager(rows: int, workbook_ids, seed: int = 0) -> pd.DataFrame:
+    """
+    SCM weekly report: most spool workbooks are listed, some twice, and AV
+    READY KW comes in the mixed formats found in the real report.
+    """
+    rng = np.random.default_rng(seed + 2)
+    workbook_ids = pd.unique(pd.Series(workbook_ids).dropna()).astype(object)
+
+    years = rng.choice([2026, 2026, 2026, 2025], size=rows)
+    weeks = rng.integers(10, 40, size=rows)
+    formats = rng.integers(0, 4, size=rows)
+    av_weeks = np.array([
+        None if fmt == 0 else
+        f"{year}-W{week:02d}" if fmt == 1 else
+        f"{year}{week:02d}" if fmt == 2 else
+        f"{year}/{week}"
+        for year, week, fmt in zip(years, weeks, formats)
+    ], dtype=object)
+
+    return pd.DataFrame({
+        "SHEET NO": rng.choice(workbook_ids, size=rows),
+        "PART LIST STATE": _choice(rng, PART_LIST_STATES, rows),
+        "AV READY KW": av_weeks,
+    })
+
+
+def _write_sheet(workbook, title: str, df: pd.DataFrame, title_rows=()) -> None:
+    sheet = workbook.create_sheet(title)
+    for row in title_rows:
+        sheet.append(row)
+    sheet.append(list(df.columns))
+
+    columns = [df[column].tolist() for column in df.columns]
+    for row in zip(*columns):
+        sheet.append([None if value is None or value != value else value for value in row])
+
+
+def _write_workbook(path: Path, sheets: list) -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, df, title_rows in sheets:
+        _write_sheet(workbook, title, df, title_rows)
+    workbook.save(path)
+
+
+def generate_dataset(directory, scale: float = 1.0, seed: int = 0) -> dict:
+    """
+    Write the three source workbooks into directory.
+
+    Returns the data sources in the shape used by the app
+    ({"spools": path, "tasks": path, "piping_manager": path}).
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    spools = synthetic_spools(_rows(scale, "spools"), seed)
+    tasks = synthetic_tasks(_rows(scale, "tasks"), spools["order_id"], seed)
+    piping_manager = synthetic_piping_manager(_rows(scale, "piping_manager"), spools["ISOworkbookId"], seed)
+
+    sources = {
+        "spools": directory / SPOOLS_FILE,
+        "tasks": directory / TASKS_FILE,
+        "piping_manager": directory / PIPING_MANAGER_FILE,
+    }
+    _write_workbook(sources["spools"], [("Orders", spools, ())])
+    _write_workbook(sources["tasks"], [("Tasks", tasks, ())])
+    _write_workbook(sources["piping_manager"], [("SCM_Weekly_Reporting", piping_manager, [["report"]])])
+
+    return {name: str(path) for name, path in sources.items()}
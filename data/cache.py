@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+"""
+DATA LAYER - Columnar cache
+
+Keeps a Parquet copy of every parsed Excel export next to the source file,
+so unchanged exports are not parsed by openpyxl again on every rerun.
+
+Responsibilities:
+- Fingerprint source files (size + mtime fast path, then content hash)
+- Store normalized columnar copies keyed by content hash and loader variant
+- Evict entries that belong to an older version of the same source
+
+Architectural rules:
+- No Streamlit imports
+- Cache failures never break loading (fall back to the Excel parse)
+"""
+
+
+CACHE_DIR_NAME = ".spool_cache"
+CACHE_FORMAT = "1"
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _cache_dir(path: Path) -> Path:
+    return path.parent / CACHE_DIR_NAME
+
+
+def _manifest_path(path: Path) -> Path:
+    return _cache_dir(path) / f"{path.name}.json"
+
+
+def _entry_path(path: Path, variant: str, digest: str) -> Path:
+    return _cache_dir(path) / f"{path.name}--{variant}--{digest}.parquet"
+
+
+def _read_manifest(path: Path) -> dict:
+    try:
+        with open(_manifest_path(path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path: Path, manifest: dict) -> None:
+    target = _manifest_path(path)
+    tmp = target.with_name(target.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, target)
+
+
+def _content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def file_fingerprint(path) -> str:
+    """
+    Content hash of a source file.
+
+    The hash is only recomputed when size or mtime differ from the last
+    recorded stat, so an unchanged export costs a single os.stat call.
+    """
+    path = Path(path)
+    stat = path.stat()
+    manifest = _read_manifest(path)
+
+    if manifest.get("size") == stat.st_size and manifest.get("mtime_ns") == stat.st_mtime_ns:
+        return manifest["sha256"]
+
+    digest = _content_hash(path)
+    try:
+        _cache_dir(path).mkdir(exist_ok=True)
+        _write_manifest(path, {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        })
+    except OSError:
+        pass
+
+    return digest
+
+
+def _normalize_for_parquet(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parquet needs one type per column. Excel columns with mixed cell types
+    are stored as text; every loader casts these columns to str anyway.
+    """
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].map(lambda value: value if pd.isna(value) else str(value))
+
+    return df
+
+
+def _evict_stale(path: Path, digest: str) -> None:
+    for entry in _cache_dir(path).glob(f"{path.name}--*.parquet"):
+        if not entry.name.endswith(f"--{digest}.parquet"):
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+
+def read_cached(path, variant: str, reader) -> pd.DataFrame:
+    """
+    Return reader() for the given source file, served from the columnar
+    cache when the file content has not changed since the last parse.
+
+    variant identifies what reader() extracts from the file (sheet, columns),
+    so several loaders can cache different views of the same workbook.
+    """
+    path = Path(path)
+    digest = file_fingerprint(path)
+    entry = _entry_path(path, f"{variant}-v{CACHE_FORMAT}", digest)
+
+    if entry.exists():
+        try:
+            return pd.read_parquet(entry)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = _normalize_for_parquet(reader())
+
+    try:
+        _cache_dir(path).mkdir(exist_ok=True)
+        tmp = entry.with_name(entry.name + ".tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, entry)
+        _evict_stale(path, digest)
+    except (ImportError, OSError, TypeError, ValueError):
+        pass
+
+    return df
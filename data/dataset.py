@@ -0,0 +1,259 @@
+import hashlib
+import os
+from concurrent.futures import BrokenExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from data.cache import file_fingerprint
+from data.delta import SpoolDelta, SpoolIngestState
+from data.loader import check_spools, combine_spools, read_spools
+from data.loader_tasks import TaskIndex, index_tasks, load_tasks
+from data.loader_piping_manager import load_piping_manager_checks
+from data.sources import concat_sources, is_multi_file, source_files
+from instrumentation.stages import measure, stage
+"""
+DATA LAYER - Dataset context
+
+Bundles the outputs of all loaders for one version of the data sources,
+so every view of a rerun works on the same frames and each file is parsed
+only once.
+
+Spools and tasks may be several exports (a directory or glob pattern, see
+data.sources). Every file is independent, so all files of all sources are
+read concurrently in a process pool (openpyxl parsing holds the GIL). Each
+worker returns the normalized frame of one file; the files of a source are
+combined in this process, and the checks run once on the combined frame.
+A failing file is reported by source and file without stopping the others.
+
+Architectural rules:
+- No Streamlit imports
+- Frames are shared between views and must be treated as read-only
+"""
+
+
+# Source name -> reader run in the worker process.
+SOURCE_READERS = {
+    "spools": read_spools,
+    "tasks": load_tasks,
+    "piping_manager": load_piping_manager_checks,
+}
+
+# Source name -> combiner of the frames of a multi-file source
+# (label -> frame). Other sources must be a single file.
+SOURCE_COMBINERS = {
+    "spools": combine_spools,
+    "tasks": concat_sources,
+}
+
+def _load_workers() -> int:
+    default = os.cpu_count() or 1
+    try:
+        return max(1, int(os.environ.get("SPOOL_LOAD_WORKERS", default)))
+    except ValueError:
+        return default
+
+
+# One worker per CPU; workers are started as files are submitted. With a
+# single worker (or SPOOL_LOAD_WORKERS=1) the files are read one after
+# another in-process. An invalid SPOOL_LOAD_WORKERS falls back to the CPU
+# count.
+LOAD_WORKERS = _load_workers()
+
+_executor = None
+
+
+class DatasetLoadError(Exception):
+    """One or more data sources could not be loaded."""
+
+    def __init__(self, errors: dict):
+        self.errors = errors
+        super().__init__("; ".join(f"{name}: {error}" for name, error in errors.items()))
+
+
+@dataclass(frozen=True)
+class SpoolDataset:
+    version: tuple
+    spools: pd.DataFrame
+    duplicates: pd.DataFrame
+    archive_conflicts: pd.DataFrame
+    tasks: pd.DataFrame
+    task_index: TaskIndex
+    piping_manager: pd.DataFrame
+    ingest: SpoolIngestState | None = None
+    delta: SpoolDelta | None = None
+
+
+def _source_version(source) -> tuple:
+    # (description, fingerprint) of a file, or of all files of a source.
+    if not is_multi_file(source):
+        return str(source), file_fingerprint(source)
+
+    files = source_files(source)
+    digest = hashlib.sha256()
+    for label, path in files.items():
+        digest.update(f"{label}\0{file_fingerprint(path)}\0".encode("utf-8"))
+    description = str(source) if not isinstance(source, dict) else ", ".join(files)
+    return description, digest.hexdigest()[:32]
+
+
+def dataset_version(data_sources: dict) -> tuple:
+    return tuple(
+        (name, *_source_version(source))
+        for name, source in sorted(data_sources.items())
+    )
+
+
+def _source_jobs(name: str, source) -> dict:
+    """Label -> path of the files to read for one source (label None: single file)."""
+    if not is_multi_file(source):
+        return {None: source}
+    if name not in SOURCE_COMBINERS:
+        raise ValueError(f"{name} must be a single file, not {source}")
+    return source_files(source)
+
+
+def _read_source(name: str, path) -> pd.DataFrame:
+    return SOURCE_READERS[name](path)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # multiprocessing is only imported when sources are read in parallel.
+        from concurrent.futures import ProcessPoolExecutor
+
+        _executor = ProcessPoolExecutor(max_workers=LOAD_WORKERS)
+    return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+
+
+@stage()
+def read_sources(data_sources: dict, parallel: bool = True) -> dict:
+    """
+    Source name -> frame of SOURCE_READERS for every data source. A
+    source is a path, a directory or glob pattern, or a dict label ->
+    path (see data.sources); multi-file sources are combined with
+    SOURCE_COMBINERS.
+
+    Raises DatasetLoadError with the error of every failed source (or
+    file) after all files have been tried. A failed combine is reported
+    under the source name.
+    """
+    frames = {}
+    errors = {}
+
+    # (name, label) -> path
+    jobs = {}
+    for name, source in data_sources.items():
+        try:
+            jobs.update({(name, label): path for label, path in _source_jobs(name, source).items()})
+        except Exception as error:
+            errors[name] = error
+
+    futures = {}
+    if parallel and LOAD_WORKERS > 1 and len(jobs) > 1:
+        try:
+            executor = _get_executor()
+            futures = {
+                job: executor.submit(_read_source, job[0], str(path))
+                for job, path in jobs.items()
+            }
+        except (BrokenExecutor, OSError, RuntimeError):
+            _reset_executor()
+            futures = {}
+
+    files = {}
+    for (name, label), path in jobs.items():
+        error_key = name if label is None else f"{name} ({label})"
+        try:
+            # Timed here, in the parent: stages recorded in a worker
+            # process never reach this rerun's log.
+            with measure(f"_read_source({error_key})") as record:
+                if (name, label) in futures:
+                    frame = futures[(name, label)].result()
+                else:
+                    frame = _read_source(name, path)
+                if record is not None:
+                    record["rows_out"] = len(frame)
+        except BrokenExecutor as error:
+            _reset_executor()
+            errors[error_key] = error
+            continue
+        except Exception as error:
+            errors[error_key] = error
+            continue
+
+        if label is None:
+            frames[name] = frame
+        else:
+            files.setdefault(name, {})[label] = frame
+
+    for name, source_frames in files.items():
+        if any(key == name or key.startswith(f"{name} (") for key in errors):
+            continue
+        try:
+            frames[name] = SOURCE_COMBINERS[name](source_frames)
+        except Exception as error:
+            errors[name] = error
+
+    if errors:
+        raise DatasetLoadError(errors)
+
+    return frames
+
+
+@stage()
+def load_dataset(
+    data_sources: dict,
+    version: tuple | None = None,
+    ingest: SpoolIngestState | None = None,
+    parallel: bool = True,
+) -> SpoolDataset:
+    """
+    With an ingest state, spools are diffed against the previously
+    ingested export and checks are only recomputed for changed workbooks.
+
+    Raises DatasetLoadError for read errors and for an export the checks
+    or the task index cannot process (e.g. a missing column), keyed by
+    the source name.
+    """
+    frames = read_sources(data_sources, parallel)
+
+    # After reading, so missing files are reported per source by
+    # read_sources instead of failing on the first fingerprint.
+    if version is None:
+        version = dataset_version(data_sources)
+
+    delta = None
+    try:
+        if ingest is None:
+            spools, duplicates, archive_conflicts = check_spools(frames["spools"])
+        else:
+            spools, duplicates, archive_conflicts, delta = ingest.ingest(frames["spools"])
+    except Exception as error:
+        raise DatasetLoadError({"spools": error}) from error
+
+    tasks = frames["tasks"]
+    try:
+        task_index = index_tasks(tasks)
+    except Exception as error:
+        raise DatasetLoadError({"tasks": error}) from error
+
+    return SpoolDataset(
+        version=version,
+        spools=spools,
+        duplicates=duplicates,
+        archive_conflicts=archive_conflicts,
+        tasks=tasks,
+        task_index=task_index,
+        piping_manager=frames["piping_manager"],
+        ingest=ingest,
+        delta=delta,
+    )
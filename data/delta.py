@@ -0,0 +1,161 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from data.loader import (
+    DUPLICATE_ISSUE_COLUMNS,
+    _build_archive_conflicts,
+    _build_duplicate_issues,
+    _sort_duplicate_issues,
+    split_spools,
+)
+"""
+DATA LAYER - Incremental ingestion
+
+Diffs a new MES export against the last ingested one and recomputes the
+workbook-level checks only for workbooks touched by changed rows.
+
+Every row is identified by a hash of id and the normalized columns the
+checks read (CHECK_COLUMNS). Rows whose hash appears more or fewer times than in the
+previous export were added, removed or changed; their workbooks (old and
+new var_ISOworkbookId) are touched. This also works when the export has
+no usable id column.
+
+Architectural rules:
+- No Streamlit imports
+- Results are identical to a full recompute (load_spools)
+"""
+
+
+# Columns the workbook-level checks depend on.
+CHECK_COLUMNS = [
+    "id",
+    "archived",
+    "state",
+    "var_ISOworkbookId",
+    "var_ex_internal_rev",
+    "class_Station",
+]
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df[CHECK_COLUMNS], index=False)
+
+
+def touched_workbooks(previous: pd.DataFrame, previous_hashes: pd.Series, current: pd.DataFrame, current_hashes: pd.Series) -> set:
+    counts = pd.concat(
+        [current_hashes.value_counts(), previous_hashes.value_counts()],
+        axis=1,
+    ).fillna(0)
+    changed = counts.index[counts.iloc[:, 0].to_numpy() != counts.iloc[:, 1].to_numpy()]
+
+    return (
+        set(current.loc[current_hashes.isin(changed).to_numpy(), "var_ISOworkbookId"])
+        | set(previous.loc[previous_hashes.isin(changed).to_numpy(), "var_ISOworkbookId"])
+    )
+
+
+def _merge_duplicate_issues(previous: pd.DataFrame, recomputed: pd.DataFrame, touched: set) -> pd.DataFrame:
+    kept = previous[~previous["var_ISOworkbookId"].isin(touched)]
+    parts = [part for part in (kept, recomputed) if not part.empty]
+
+    if not parts:
+        return pd.DataFrame(columns=DUPLICATE_ISSUE_COLUMNS)
+
+    return _sort_duplicate_issues(pd.concat(parts, ignore_index=True))
+
+
+@dataclass(frozen=True)
+class SpoolDelta:
+    generation: int
+    # Workbook ids touched since the previous ingest, None = everything.
+    touched: frozenset | None
+
+
+class SpoolIngestState:
+    """
+    Last ingested spools export and the checks computed from it.
+
+    One instance per spools source. ingest() is serialized with a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.spools = None
+        self.hashes = None
+        self.duplicates = None
+        self.conflict_workbooks = None
+        self._row_results = {}
+
+    def ingest(self, df: pd.DataFrame):
+        """
+        Same result as load_spools for the normalized frame df
+        (see data.loader.read_spools), plus the SpoolDelta of this ingest.
+        """
+        with self._lock:
+            return self._ingest(df)
+
+    def _ingest(self, df: pd.DataFrame):
+        active_df, archived_completed = split_spools(df)
+        hashes = row_hashes(df)
+
+        touched = None
+        if self.spools is not None:
+            touched = touched_workbooks(self.spools, self.hashes, df, hashes)
+
+        if touched is None:
+            duplicates = _build_duplicate_issues(active_df)
+            conflicts = _build_archive_conflicts(archived_completed, active_df)
+            conflict_workbooks = set(conflicts["var_ISOworkbookId"])
+        else:
+            touched_active = active_df[active_df["var_ISOworkbookId"].isin(touched)]
+            touched_archived = archived_completed[archived_completed["var_ISOworkbookId"].isin(touched)]
+
+            duplicates = _merge_duplicate_issues(
+                self.duplicates,
+                _build_duplicate_issues(touched_active),
+                touched,
+            )
+            conflict_workbooks = (
+                (self.conflict_workbooks - touched)
+                | set(_build_archive_conflicts(touched_archived, touched_active)["var_ISOworkbookId"])
+            )
+            conflicts = archived_completed[
+                archived_completed["var_ISOworkbookId"].isin(conflict_workbooks)
+            ][["var_ISOworkbookId"]].drop_duplicates()
+
+        self.generation += 1
+        self.spools = df
+        self.hashes = hashes
+        self.duplicates = duplicates
+        self.conflict_workbooks = conflict_workbooks
+
+        delta = SpoolDelta(self.generation, None if touched is None else frozenset(touched))
+        return active_df, duplicates, conflicts, delta
+
+    def reuse_rows(self, name: str, df: pd.DataFrame, compute, columns: list) -> pd.DataFrame:
+        """
+        Row-level result of compute(df), where each result row depends only
+        on the given columns of its input row.
+
+        Results are remembered by a hash of those columns, so after a new
+        export only rows with new content are computed.
+        """
+        hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+        cached = self._row_results.get(name)
+
+        if cached is None:
+            result = compute(df)
+        else:
+            stale = ~pd.Index(hashes).isin(cached.index)
+            fresh = compute(df[stale])
+            kept = cached.reindex(hashes[~stale])
+            order = np.argsort(np.concatenate([np.flatnonzero(~stale), np.flatnonzero(stale)]))
+            result = pd.concat([kept, fresh]).iloc[order].set_axis(df.index)
+
+        by_hash = result.set_axis(hashes)
+        self._row_results[name] = by_hash[~by_hash.index.duplicated()]
+        return result
@@ -0,0 +1,136 @@
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+"""
+DATA LAYER - Excel reader
+
+Column-projected reader shared by all loaders.
+
+Resolves the header row first, maps the requested columns through their
+aliases and then streams only those cells from openpyxl in read-only mode.
+Wide exports are never materialized as full-width rows or frames.
+
+Cell conversion and type inference follow pandas.read_excel (openpyxl
+engine), so the loaders see the same values as before.
+
+Architectural rules:
+- No Streamlit imports
+- No normalization beyond header matching
+"""
+
+
+def _column_key(value: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(value).replace("\u00a0", " ").lower())
+
+
+def clean_header(value) -> str:
+    return str(value).replace("\u00a0", " ").strip()
+
+
+def resolve_columns(headers: list, aliases: dict) -> dict:
+    """
+    Map canonical column name -> position in headers.
+
+    An exact header match wins; otherwise the first alias whose
+    _column_key matches a header is used.
+    """
+    headers = [clean_header(header) for header in headers]
+    exact = {}
+    lookup = {}
+    for position, header in enumerate(headers):
+        exact.setdefault(header, position)
+        lookup[_column_key(header)] = position
+
+    resolved = {}
+    for canonical, names in aliases.items():
+        if canonical in exact:
+            resolved[canonical] = exact[canonical]
+            continue
+
+        source = next(
+            (lookup[_column_key(name)] for name in names if _column_key(name) in lookup),
+            None,
+        )
+        if source is not None:
+            resolved[canonical] = source
+
+    return resolved
+
+
+def _convert_cell(cell):
+    # Same conversion as pandas' openpyxl reader.
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        if value == cell.value:
+            return value
+        return float(cell.value)
+    return cell.value
+
+
+def read_excel_columns(
+    path,
+    aliases: dict,
+    sheet_name=0,
+    header: int = 0,
+    dtype=None,
+    keep_headers=(),
+) -> pd.DataFrame:
+    """
+    Read only the columns in aliases (canonical name -> accepted header
+    names) from one sheet. Columns are returned under their canonical
+    names, except those in keep_headers, which keep the header they have
+    in the sheet; columns missing from the sheet are left out.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        sheet.reset_dimensions()
+
+        rows = sheet.iter_rows()
+        for _ in range(header + 1):
+            header_cells = next(rows, None)
+            if header_cells is None:
+                return pd.DataFrame(columns=list(aliases))
+        headers = [clean_header(_convert_cell(cell)) for cell in header_cells]
+        resolved = resolve_columns(headers, aliases)
+
+        names = [
+            headers[position] if canonical in keep_headers else canonical
+            for canonical, position in resolved.items()
+        ]
+        positions = list(resolved.values())
+        data = [names]
+        last_row_with_data = 0
+
+        for row in rows:
+            width = len(row)
+            values = [
+                _convert_cell(row[position]) if position < width else ""
+                for position in positions
+            ]
+            data.append(values)
+            if any(value != "" for value in values):
+                last_row_with_data = len(data) - 1
+    finally:
+        workbook.close()
+
+    data = data[:last_row_with_data + 1]
+    if not names:
+        return pd.DataFrame(index=pd.RangeIndex(len(data) - 1))
+
+    return TextParser(
+        data,
+        header=0,
+        dtype=dtype,
+        skip_blank_lines=False,
+    ).read()
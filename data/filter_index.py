@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+"""
+DATA LAYER - Filter index
+
+Bitmap index over a few low-cardinality columns of a frame (production
+week, station, state), for the Work Preparation filters.
+
+Every value of an indexed column maps to a bitmap with one bit per row,
+packed into 64-bit words. A combined filter is the bitwise AND of the
+bitmaps of the selected values, and a count is the popcount of a bitmap,
+so filtering and counting never compare the column values again.
+
+Architectural rules:
+- No Streamlit imports
+- Same matching rules as column == value (missing values never match)
+"""
+
+
+def _popcount(words: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    # numpy < 2.0
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, columns: list):
+        self.row_count = len(df)
+        # Bytes per bitmap, rounded up to whole 64-bit words.
+        self._byte_count = -(-self.row_count // 64) * 8
+        self._all = self._pack(np.ones(self.row_count, dtype=bool))
+        self._none = np.zeros_like(self._all)
+        self._bitmaps = {}
+
+        for column in columns:
+            codes, uniques = pd.factorize(df[column])
+            self._bitmaps[column] = {
+                value: self._pack(codes == code)
+                for code, value in enumerate(uniques)
+            }
+
+    def _pack(self, mask: np.ndarray) -> np.ndarray:
+        packed = np.zeros(self._byte_count, dtype=np.uint8)
+        packed[:-(-len(mask) // 8)] = np.packbits(mask, bitorder="little")
+        return packed.view(np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        return (2 + sum(map(len, self._bitmaps.values()))) * self._all.nbytes
+
+    def select(self, filters: dict) -> np.ndarray:
+        """
+        Bitmap of the rows where every column in filters equals its value.
+        None values are not filtered on.
+        """
+        bitmap = self._all
+        for column, value in filters.items():
+            if value is None:
+                continue
+            bitmap = bitmap & self._bitmaps[column].get(value, self._none)
+        return bitmap
+
+    def count(self, bitmap: np.ndarray) -> int:
+        return _popcount(bitmap)
+
+    def counts(self, column: str, bitmap: np.ndarray) -> dict:
+        """Rows of bitmap per value of column, values without rows left out."""
+        counts = {}
+        for value, value_bitmap in self._bitmaps[column].items():
+            count = _popcount(bitmap & value_bitmap)
+            if count:
+                counts[value] = count
+        return counts
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        """Row positions of the set bits, ascending."""
+        # Only words with any bit set are unpacked; padding bits are 0.
+        words = np.flatnonzero(bitmap)
+        bits = np.unpackbits(bitmap[words].view(np.uint8), bitorder="little").reshape(-1, 64)
+        word_positions, bit_positions = np.nonzero(bits)
+        return words[word_positions] * 64 + bit_positions
+
+    def take(self, df: pd.DataFrame, bitmap: np.ndarray) -> pd.DataFrame:
+        """Rows of df (the indexed frame) selected by bitmap, in order."""
+        if bitmap is self._all:
+            return df
+        return df.iloc[self.positions(bitmap)]
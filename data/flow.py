@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from data.history import COMPRESSION, SnapshotStore
+from logic.station_flow import (
+    OPEN_STAY_COLUMNS,
+    advance,
+    empty_open_stays,
+    empty_stays,
+    spool_positions,
+)
+"""
+DATA LAYER - Station flow state
+
+Keeps the station flow (logic.station_flow) up to date one export at a
+time, so a new export costs one diff against the open stays instead of a
+rescan of the whole history.
+
+Layout (under the flow directory, next to the snapshot history):
+    state.json                      time of the last export applied
+    open.parquet                    stays still open after that export
+    stays/week=2026-W42.parquet     closed stays, by ISO week they ended
+
+An update rewrites open.parquet and the stays file of the current week
+only.
+
+Exports must be applied in ingest order; an export older than the last
+one applied is ignored. rebuild() replays the snapshot history, e.g.
+after importing old backups.
+
+Architectural rules:
+- No Streamlit imports
+"""
+
+
+FLOW_DIR_NAME = "flow"
+STATE_NAME = "state.json"
+OPEN_NAME = "open.parquet"
+STAYS_DIR_NAME = "stays"
+
+POSITION_COLUMNS = ["id", "name", "var_ISOworkbookId", "archived", "class_Station"]
+
+
+def flow_dir(history_directory) -> Path:
+    return Path(history_directory) / FLOW_DIR_NAME
+
+
+def _week_name(value: pd.Timestamp) -> str:
+    year, week, _ = value.isocalendar()
+    return f"week={year}-W{week:02d}.parquet"
+
+
+def _write_parquet(df: pd.DataFrame, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    df.to_parquet(tmp, index=False, compression=COMPRESSION)
+    os.replace(tmp, target)
+
+
+class StationFlowStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # STATE
+    # -----------------------------
+    def _read_state(self) -> dict:
+        try:
+            with open(self.directory / STATE_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_state(self, state: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / STATE_NAME
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, target)
+
+    @property
+    def updated_at(self):
+        """Time of the last export applied, None before the first."""
+        updated_at = self._read_state().get("updated_at")
+        return None if updated_at is None else pd.Timestamp(updated_at)
+
+    def open_stays(self) -> pd.DataFrame:
+        try:
+            return pd.read_parquet(self.directory / OPEN_NAME)
+        except FileNotFoundError:
+            return empty_open_stays()
+
+    def stays(self, since=None) -> pd.DataFrame:
+        """Closed stays, optionally only those that ended at or after since."""
+        files = sorted((self.directory / STAYS_DIR_NAME).glob("week=*.parquet"))
+        if since is not None:
+            since = pd.Timestamp(since)
+            since = since.tz_localize("UTC") if since.tzinfo is None else since.tz_convert("UTC")
+            files = [path for path in files if path.name >= _week_name(since)]
+
+        if not files:
+            return empty_stays()
+
+        stays = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+        if since is not None:
+            stays = stays[stays["left_at"] >= since].reset_index(drop=True)
+        return stays
+
+    # -----------------------------
+    # UPDATES
+    # -----------------------------
+    def update(self, spools: pd.DataFrame, at) -> bool:
+        """
+        Apply the export spools (a frame from read_spools) ingested at
+        time at. Returns False when at is not newer than the last export.
+        """
+        at = pd.Timestamp(at)
+        at = at.tz_localize("UTC") if at.tzinfo is None else at.tz_convert("UTC")
+
+        with self._lock:
+            updated_at = self.updated_at
+            if updated_at is not None and at <= updated_at:
+                return False
+
+            open_stays, closed = advance(
+                self.open_stays(),
+                spool_positions(spools),
+                at,
+                first=updated_at is None,
+            )
+
+            if not closed.empty:
+                target = self.directory / STAYS_DIR_NAME / _week_name(at)
+                if target.exists():
+                    closed = pd.concat([pd.read_parquet(target), closed], ignore_index=True)
+                _write_parquet(closed, target)
+
+            _write_parquet(open_stays[OPEN_STAY_COLUMNS], self.directory / OPEN_NAME)
+            self._write_state({"updated_at": at.isoformat()})
+
+        return True
+
+    def rebuild(self, history: SnapshotStore) -> int:
+        """
+        Recompute the flow from every snapshot in history, oldest first.
+        Returns the number of snapshots applied.
+        """
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        applied = 0
+        for entry in history.catalog().to_dict("records"):
+            spools = pd.read_parquet(history.directory / entry["path"], columns=POSITION_COLUMNS)
+            applied += self.update(spools, entry["ingested_at"])
+        return applied
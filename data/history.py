@@ -0,0 +1,284 @@
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from data.cache import file_fingerprint
+from data.loader import read_spools
+from data.sources import source_root
+"""
+DATA LAYER - Snapshot history
+
+Append-only store of every ingested spools export, so history no longer
+depends on ad-hoc backup copies of spools.xlsx.
+
+Layout (under the history directory):
+    catalog.json                          one entry per snapshot
+    week=2026-W42/<snapshot id>.parquet   normalized spools (read_spools),
+                                          zstd compressed, sorted by
+                                          var_ISOworkbookId
+
+Snapshots are partitioned by the ISO week they were ingested in. Queries
+pick the snapshots they need from the catalog and read only the requested
+columns, with row filters pushed down to Parquet.
+
+Retention: every snapshot is kept for KEEP_ALL_DAYS, then only the last
+snapshot of each week, and nothing older than KEEP_WEEKS weeks.
+
+Times are stored in UTC; naive timestamps passed to queries are taken as
+UTC.
+
+Architectural rules:
+- No Streamlit imports
+- Snapshot files are never modified, only removed by retention
+"""
+
+
+HISTORY_DIR_NAME = "history"
+CATALOG_NAME = "catalog.json"
+COMPRESSION = "zstd"
+ROW_GROUP_SIZE = 16384
+
+KEEP_ALL_DAYS = 35
+KEEP_WEEKS = 104
+
+CATALOG_COLUMNS = [
+    "snapshot_id",
+    "source",
+    "source_hash",
+    "ingested_at",
+    "week",
+    "path",
+    "rows",
+    "active_rows",
+    "archived_rows",
+    "workbooks",
+]
+
+STATION_COLUMNS = [
+    "id",
+    "name",
+    "state",
+    "class_Station",
+    "var_ISOworkbookId",
+    "var_ex_internal_rev",
+    "var_workBookType",
+    "start_year_week",
+    "archived",
+]
+
+WORKBOOK_COLUMNS = [
+    "id",
+    "state",
+    "class_Station",
+    "var_ISOworkbookId",
+    "var_ex_internal_rev",
+    "start_year_week",
+    "archived",
+]
+
+
+def _utc(value) -> pd.Timestamp:
+    """
+    A date means the end of that day; naive datetimes are UTC.
+    """
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.max)
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        return value.tz_localize("UTC")
+    return value.tz_convert("UTC")
+
+
+def history_dir(spools_path) -> Path:
+    # History lives next to the spools export(s) it records.
+    return source_root(spools_path) / HISTORY_DIR_NAME
+
+
+def _iso_week(value: pd.Timestamp) -> str:
+    year, week, _ = value.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class SnapshotStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    # -----------------------------
+    # CATALOG
+    # -----------------------------
+    def _catalog_path(self) -> Path:
+        return self.directory / CATALOG_NAME
+
+    def _read_catalog(self) -> list:
+        try:
+            with open(self._catalog_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_catalog(self, entries: list) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self._catalog_path()
+        tmp = target.with_name(target.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp, target)
+
+    def catalog(self) -> pd.DataFrame:
+        """All snapshots, oldest first."""
+        entries = self._read_catalog()
+        catalog = pd.DataFrame(entries, columns=CATALOG_COLUMNS)
+        catalog["ingested_at"] = pd.to_datetime(catalog["ingested_at"], utc=True)
+        return catalog.sort_values("ingested_at", kind="mergesort").reset_index(drop=True)
+
+    # -----------------------------
+    # WRITING
+    # -----------------------------
+    def record(self, spools: pd.DataFrame, source_hash: str, source: str = "spools", ingested_at=None) -> str | None:
+        """
+        Store spools (a frame from read_spools) as a new snapshot.
+
+        Returns the snapshot id, or None when an export with this
+        source_hash is already stored.
+        """
+        ingested_at = _utc(ingested_at if ingested_at is not None else datetime.now(timezone.utc))
+
+        with self._lock:
+            entries = self._read_catalog()
+            if any(entry["source_hash"] == source_hash for entry in entries):
+                return None
+
+            week = _iso_week(ingested_at)
+            snapshot_id = f"{ingested_at:%Y%m%dT%H%M%S}-{source_hash[:12]}"
+            relative = Path(f"week={week}") / f"{snapshot_id}.parquet"
+            target = self.directory / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            snapshot = spools.sort_values("var_ISOworkbookId", kind="mergesort").reset_index(drop=True)
+            tmp = target.with_name(target.name + ".tmp")
+            snapshot.to_parquet(tmp, index=False, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp, target)
+
+            archived = int(spools["archived"].sum())
+            entries.append({
+                "snapshot_id": snapshot_id,
+                "source": source,
+                "source_hash": source_hash,
+                "ingested_at": ingested_at.isoformat(),
+                "week": week,
+                "path": relative.as_posix(),
+                "rows": len(spools),
+                "active_rows": len(spools) - archived,
+                "archived_rows": archived,
+                "workbooks": int(spools["var_ISOworkbookId"].replace("", pd.NA).nunique()),
+            })
+            self._write_catalog(entries)
+            self._apply_retention(entries, _utc(datetime.now(timezone.utc)))
+
+        return snapshot_id
+
+    def import_export(self, path, ingested_at=None) -> str | None:
+        """
+        Store an export file, e.g. an old backup copy. Without ingested_at
+        the file's modification time is used.
+        """
+        path = Path(path)
+        if ingested_at is None:
+            ingested_at = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc)
+        return self.record(read_spools(path), file_fingerprint(path), path.name, ingested_at)
+
+    # -----------------------------
+    # RETENTION
+    # -----------------------------
+    def apply_retention(self, now=None) -> list:
+        """Remove snapshots outside the retention policy; returns their ids."""
+        with self._lock:
+            return self._apply_retention(self._read_catalog(), _utc(now or datetime.now(timezone.utc)))
+
+    def _apply_retention(self, entries: list, now: pd.Timestamp) -> list:
+        keep_all_since = now - timedelta(days=KEEP_ALL_DAYS)
+        keep_since = now - timedelta(weeks=KEEP_WEEKS)
+
+        last_of_week = {}
+        for entry in entries:
+            ingested_at = _utc(entry["ingested_at"])
+            if entry["week"] not in last_of_week or ingested_at > _utc(last_of_week[entry["week"]]["ingested_at"]):
+                last_of_week[entry["week"]] = entry
+
+        kept = []
+        removed = []
+        for entry in entries:
+            ingested_at = _utc(entry["ingested_at"])
+            if ingested_at >= keep_all_since or (
+                ingested_at >= keep_since and last_of_week[entry["week"]] is entry
+            ):
+                kept.append(entry)
+            else:
+                removed.append(entry)
+
+        if removed:
+            self._write_catalog(kept)
+            for entry in removed:
+                try:
+                    (self.directory / entry["path"]).unlink()
+                except OSError:
+                    pass
+
+        return [entry["snapshot_id"] for entry in removed]
+
+    # -----------------------------
+    # QUERIES
+    # -----------------------------
+    def _read(self, entry, columns: list, filters=None) -> pd.DataFrame:
+        return pd.read_parquet(self.directory / entry["path"], columns=columns, filters=filters)
+
+    def snapshot_as_of(self, as_of):
+        """Catalog entry of the last snapshot ingested at or before as_of."""
+        catalog = self.catalog()
+        catalog = catalog[catalog["ingested_at"] <= _utc(as_of)]
+        if catalog.empty:
+            return None
+        return catalog.iloc[-1].to_dict()
+
+    def spools_at_station(self, station: str, as_of, columns: list = STATION_COLUMNS, include_archived: bool = False) -> pd.DataFrame:
+        """
+        Spools at station according to the last export ingested at or
+        before as_of. Empty when there was no snapshot yet.
+        """
+        entry = self.snapshot_as_of(as_of)
+        if entry is None:
+            return pd.DataFrame(columns=columns)
+
+        filters = [("class_Station", "==", station)]
+        if not include_archived:
+            filters.append(("archived", "==", False))
+
+        return self._read(entry, columns, filters)
+
+    def workbook_history(self, workbook_id: str, start=None, end=None, columns: list = WORKBOOK_COLUMNS) -> pd.DataFrame:
+        """
+        Rows of workbook_id in every snapshot ingested between start and
+        end (inclusive), with snapshot_id and ingested_at, oldest first.
+        """
+        catalog = self.catalog()
+        if start is not None:
+            catalog = catalog[catalog["ingested_at"] >= _utc(start)]
+        if end is not None:
+            catalog = catalog[catalog["ingested_at"] <= _utc(end)]
+
+        parts = []
+        for entry in catalog.to_dict("records"):
+            rows = self._read(entry, columns, [("var_ISOworkbookId", "==", str(workbook_id))])
+            rows.insert(0, "ingested_at", entry["ingested_at"])
+            rows.insert(0, "snapshot_id", entry["snapshot_id"])
+            parts.append(rows)
+
+        if not parts:
+            return pd.DataFrame(columns=["snapshot_id", "ingested_at"] + list(columns))
+
+        return pd.concat(parts, ignore_index=True)
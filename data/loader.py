@@ -1,6 +1,10 @@
-﻿import re
-
+﻿import numpy as np
 import pandas as pd
+
+from data.cache import read_cached
+from data.excel_reader import clean_header, read_excel_columns, resolve_columns
+from data.sources import concat_sources
+from instrumentation.stages import stage
 """
 DATA LAYER - Spools
 
@@ -81,28 +85,45 @@ COLUMN_ALIASES = {
 }
 
 
-def _column_key(value: str) -> str:
-    return re.sub(r"[^a-z0-9]", "", str(value).replace("\u00a0", " ").lower())
+# Export columns no check reads, kept as they are (values and header, e.g.
+# isometric or var_isometric) so the Work Preparation search still finds
+# isometric, spool, work package and KKS numbers.
+# order_id and "start date" are kept as id and start_date.
+SEARCH_COLUMN_ALIASES = {
+    "isometric": ["isometric", "var_isometric"],
+    "spool": ["spool", "var_spool", "spool no", "spool_no"],
+    "STL_WORK_PACKAGE": ["STL_WORK_PACKAGE", "var_STL_WORK_PACKAGE", "work package", "work_package"],
+    "ex_akz_kks": ["ex_akz_kks", "var_ex_akz_kks", "akz_kks", "akz kks"],
+    "class_Issuer": ["class_Issuer", "Issuer"],
+}
 
 
 def _normalize_headers(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    df.columns = [str(col).replace("\u00a0", " ").strip() for col in df.columns]
+    df.columns = [clean_header(col) for col in df.columns]
 
-    lookup = {_column_key(col): col for col in df.columns}
+    for canonical, position in resolve_columns(list(df.columns), COLUMN_ALIASES).items():
+        if canonical not in df.columns:
+            df[canonical] = df.iloc[:, position]
 
-    for canonical, aliases in COLUMN_ALIASES.items():
-        if canonical in df.columns:
-            continue
+    return df
 
-        source = next(
-            (lookup[_column_key(alias)] for alias in aliases if _column_key(alias) in lookup),
-            None,
-        )
-        if source is not None:
-            df[canonical] = df[source]
 
-    return df
+# Low-cardinality columns stored as pandas Categoricals. Categories are
+# sorted, so sorting by a column gives the same order as sorting its text.
+CATEGORY_COLUMNS = [
+    "state",
+    "class_Station",
+    "var_workBookType",
+    "label_type",
+    "quality_class",
+    "pressure_risk",
+    "start_year_week",
+]
+
+
+def _as_category(series: pd.Series) -> pd.Series:
+    return pd.Categorical(series, categories=sorted(set(series.dropna().unique())))
 
 
 def _ensure_column(df: pd.DataFrame, column: str, default="") -> None:
@@ -134,84 +155,142 @@ def _clean_text(series: pd.Series, default="") -> pd.Series:
         .str.strip()
     )
 
-def _format_values(series: pd.Series) -> str:
-    values = sorted(
-        value for value in series.dropna().astype(str).str.strip().unique() if value
-    )
-    return ", ".join(values)
-
 
-def _build_duplicate_issues(active_df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-    spool_rows = active_df[active_df["var_ISOworkbookId"].ne("")]
+DUPLICATE_ISSUE_COLUMNS = [
+    "severity",
+    "issue",
+    "var_ISOworkbookId",
+    "revisions",
+    "open_revisions",
+    "states",
+    "stations",
+    "row_count",
+    "open_count",
+    "cancelled_count",
+    "closed_count",
+    "action",
+]
+
+
+def _format_group_values(df: pd.DataFrame, key: str, column: str, strip: bool = True) -> pd.Series:
+    """
+    Sorted, comma-joined distinct non-empty values of column per key,
+    computed for all groups at once.
+    """
+    present = df[column].notna().to_numpy()
+    values = df[column][present].astype(str)
+    if strip:
+        values = values.str.strip()
+    non_empty = values.ne("").to_numpy()
+
+    pairs = (
+        pd.DataFrame({
+            key: df[key].to_numpy()[present][non_empty],
+            column: values.to_numpy()[non_empty],
+        })
+        .drop_duplicates()
+        .sort_values([key, column], kind="mergesort")
+    )
+    if pairs.empty:
+        return pd.Series(dtype=object)
 
-    for sheet_no, group in spool_rows.groupby("var_ISOworkbookId", dropna=False):
-        if len(group) <= 1:
-            continue
+    keys = pairs[key].to_numpy()
+    values = pairs[column].tolist()
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
 
-        open_rows = group[group["state"].isin(OPEN_STATES)]
-        cancelled_rows = group[group["state"].isin(CANCELLED_STATES)]
-        closed_rows = group[group["state"].isin(CLOSED_STATES)]
-        history_rows = pd.concat([cancelled_rows, closed_rows])
+    return pd.Series(
+        [", ".join(values[start:end]) for start, end in zip(starts, ends)],
+        index=keys[starts],
+    )
 
-        open_revisions = sorted(
-            rev for rev in open_rows["var_ex_internal_rev"].dropna().astype(str).unique() if rev
-        )
 
-        if len(open_rows) > 1 and len(open_revisions) > 1:
-            severity = "High"
-            issue = "Multiple open revisions"
-            action = "Problem: more than one revision is still active/open."
-        elif len(open_rows) > 1:
-            severity = "High"
-            issue = "Same revision open more than once"
-            action = "Problem: duplicate open rows exist for the same revision."
-        elif len(open_rows) == 1 and not history_rows.empty:
-            severity = "Medium"
-            issue = "Open row with cancelled/closed older version"
-            action = "Review: usually acceptable when the older revision is cancelled/closed."
-        elif len(open_rows) == 1:
-            severity = "Medium"
-            issue = "Single open row with duplicate history"
-            action = "Review duplicate history for this workbook."
-        else:
-            severity = "Low"
-            issue = "Only cancelled/closed duplicate history"
-            action = "Usually OK: no open duplicate rows remain."
-
-        rows.append({
-            "severity": severity,
-            "issue": issue,
-            "var_ISOworkbookId": sheet_no,
-            "revisions": _format_values(group["var_ex_internal_rev"]),
-            "open_revisions": ", ".join(open_revisions),
-            "states": _format_values(group["state"]),
-            "stations": _format_values(group["class_Station"]),
-            "row_count": len(group),
-            "open_count": len(open_rows),
-            "cancelled_count": len(cancelled_rows),
-            "closed_count": len(closed_rows),
-            "action": action,
+@stage()
+def _build_duplicate_issues(active_df: pd.DataFrame) -> pd.DataFrame:
+    spool_rows = active_df[active_df["var_ISOworkbookId"].ne("")]
+    key = "var_ISOworkbookId"
+
+    counts = (
+        pd.DataFrame({
+            key: spool_rows[key],
+            "row_count": 1,
+            "open_count": spool_rows["state"].isin(OPEN_STATES),
+            "cancelled_count": spool_rows["state"].isin(CANCELLED_STATES),
+            "closed_count": spool_rows["state"].isin(CLOSED_STATES),
         })
+        .groupby(key, dropna=False)
+        .sum()
+    )
+    counts = counts[counts["row_count"] > 1]
+
+    if counts.empty:
+        return pd.DataFrame(columns=DUPLICATE_ISSUE_COLUMNS)
+
+    group_rows = spool_rows[spool_rows[key].isin(counts.index)]
+    open_rows = group_rows[group_rows["state"].isin(OPEN_STATES)]
+    has_revision = open_rows["var_ex_internal_rev"].notna().to_numpy()
+    open_revision_count = (
+        pd.DataFrame({
+            key: open_rows[key].to_numpy()[has_revision],
+            "revision": open_rows["var_ex_internal_rev"][has_revision].astype(str).to_numpy(),
+        })
+        .loc[lambda pairs: pairs["revision"].ne("")]
+        .groupby(key, dropna=False)["revision"]
+        .nunique()
+        .reindex(counts.index, fill_value=0)
+    )
 
-    if not rows:
-        return pd.DataFrame(columns=[
-            "severity",
-            "issue",
-            "var_ISOworkbookId",
-            "revisions",
-            "open_revisions",
-            "states",
-            "stations",
-            "row_count",
-            "open_count",
-            "cancelled_count",
-            "closed_count",
-            "action",
-        ])
+    open_count = counts["open_count"]
+    history_count = counts["cancelled_count"] + counts["closed_count"]
+    conditions = [
+        (open_count > 1) & (open_revision_count > 1),
+        open_count > 1,
+        (open_count == 1) & (history_count > 0),
+        open_count == 1,
+    ]
+    severity = np.select(conditions, ["High", "High", "Medium", "Medium"], "Low")
+    issue = np.select(conditions, [
+        "Multiple open revisions",
+        "Same revision open more than once",
+        "Open row with cancelled/closed older version",
+        "Single open row with duplicate history",
+    ], "Only cancelled/closed duplicate history")
+    action = np.select(conditions, [
+        "Problem: more than one revision is still active/open.",
+        "Problem: duplicate open rows exist for the same revision.",
+        "Review: usually acceptable when the older revision is cancelled/closed.",
+        "Review duplicate history for this workbook.",
+    ], "Usually OK: no open duplicate rows remain.")
+
+    def joined(df, column, strip=True):
+        return _format_group_values(df, key, column, strip).reindex(counts.index, fill_value="").to_numpy()
+
+    result = pd.DataFrame({
+        "severity": severity,
+        "issue": issue,
+        "var_ISOworkbookId": counts.index.to_numpy(),
+        "revisions": joined(group_rows, "var_ex_internal_rev"),
+        "open_revisions": joined(open_rows, "var_ex_internal_rev", strip=False),
+        "states": joined(group_rows, "state"),
+        "stations": joined(group_rows, "class_Station"),
+        "row_count": counts["row_count"].to_numpy(),
+        "open_count": counts["open_count"].to_numpy(),
+        "cancelled_count": counts["cancelled_count"].to_numpy(),
+        "closed_count": counts["closed_count"].to_numpy(),
+        "action": action,
+    })
+
+    return _sort_duplicate_issues(result)
+
+
+def _sort_duplicate_issues(result: pd.DataFrame) -> pd.DataFrame:
+    """
+    Number issues in workbook order, then sort by severity.
+    Also used to merge partial results of incremental ingestion.
+    """
+    result = result.sort_values("var_ISOworkbookId", kind="mergesort").reset_index(drop=True)
 
     severity_order = {"High": 0, "Medium": 1, "Low": 2}
-    result = pd.DataFrame(rows)
     result["_severity_order"] = result["severity"].map(severity_order).fillna(9)
     return result.sort_values(["_severity_order", "var_ISOworkbookId"]).drop(columns="_severity_order")
 
@@ -234,8 +313,20 @@ def _add_start_week_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def load_spools(path: str):
-    df = _normalize_headers(pd.read_excel(path))
+@stage()
+def read_spools(path: str) -> pd.DataFrame:
+    """
+    Read and normalize all spool rows of a MES export (active and archived).
+    """
+    df = _normalize_headers(read_cached(
+        path,
+        "spools-search-headers",
+        lambda: read_excel_columns(
+            path,
+            {**COLUMN_ALIASES, **SEARCH_COLUMN_ALIASES},
+            keep_headers=SEARCH_COLUMN_ALIASES,
+        ),
+    ))
 
     for column in [
         "id",
@@ -289,6 +380,31 @@ def load_spools(path: str):
     )
     df["is_red_label"] = df["label_type"] == "Red label"
 
+    # -----------------------------
+    # CATEGORICALS
+    # -----------------------------
+    for column in CATEGORY_COLUMNS:
+        df[column] = _as_category(df[column])
+
+    return df
+
+
+@stage()
+def combine_spools(frames: dict) -> pd.DataFrame:
+    """
+    One read_spools frame from the frames of several exports (label ->
+    frame), with a source_file column. Categories are rebuilt over all
+    files; duplicate checks then run once on the combined frame.
+    """
+    df = concat_sources(frames)
+
+    for column in CATEGORY_COLUMNS:
+        df[column] = _as_category(df[column])
+
+    return df
+
+
+def split_spools(df: pd.DataFrame):
     # -----------------------------
     # ACTIVE / ARCHIVED SPLIT
     # -----------------------------
@@ -298,15 +414,34 @@ def load_spools(path: str):
         (df["archived"] == True) & (df["state"] == "completed")
     ]
 
-    # -----------------------------
-    # CHECK 1 - ARCHIVE CONFLICTS
-    # -----------------------------
-    archive_conflicts = archived_completed[
+    return active_df, archived_completed
+
+
+@stage()
+def _build_archive_conflicts(archived_completed: pd.DataFrame, active_df: pd.DataFrame) -> pd.DataFrame:
+    return archived_completed[
         archived_completed["var_ISOworkbookId"].isin(
             active_df["var_ISOworkbookId"]
         )
     ][["var_ISOworkbookId"]].drop_duplicates()
 
+
+@stage()
+def load_spools(path: str):
+    return check_spools(read_spools(path))
+
+
+def check_spools(df: pd.DataFrame):
+    """
+    Active spools and integrity checks of a frame from read_spools.
+    """
+    active_df, archived_completed = split_spools(df)
+
+    # -----------------------------
+    # CHECK 1 - ARCHIVE CONFLICTS
+    # -----------------------------
+    archive_conflicts = _build_archive_conflicts(archived_completed, active_df)
+
     # -----------------------------
     # CHECK 2 - DUPLICATES / REVISIONS (ACTIVE)
     # -----------------------------
@@ -2,6 +2,10 @@
 
 import pandas as pd
 
+from data.cache import read_cached
+from data.excel_reader import read_excel_columns
+from instrumentation.stages import stage
+
 
 PM_PATH = (
     r"C:\Users\domag\spool_tracking_backup_20260421_212416"
@@ -9,6 +13,13 @@ PM_PATH = (
 )
 
 
+PM_COLUMNS = {
+    "SHEET NO": ["SHEET NO"],
+    "PART LIST STATE": ["PART LIST STATE"],
+    "AV READY KW": ["AV READY KW"],
+}
+
+
 def _clean_text(series: pd.Series) -> pd.Series:
     return (
         series.fillna("")
@@ -32,19 +43,15 @@ def _normalize_week(value) -> str:
     return f"{int(year)}-W{int(week):02d}"
 
 
+@stage()
 def load_piping_manager_checks(path: str = PM_PATH) -> pd.DataFrame:
-    df = pd.read_excel(
+    df = read_cached(path, "scm_weekly_reporting-columns", lambda: read_excel_columns(
         path,
+        PM_COLUMNS,
         sheet_name="SCM_Weekly_Reporting",
         header=1,
         dtype=str,
-        usecols=lambda column: column
-        in {
-            "SHEET NO",
-            "PART LIST STATE",
-            "AV READY KW",
-        },
-    )
+    ))
 
     result = pd.DataFrame()
     result["var_ISOworkbookId"] = _clean_text(df["SHEET NO"])
@@ -1,16 +1,36 @@
-﻿import pandas as pd
+﻿from dataclasses import dataclass
 
+import numpy as np
+import pandas as pd
 
+from data.cache import read_cached
+from data.excel_reader import read_excel_columns
+from instrumentation.stages import stage
+
+
+TASK_COLUMNS = {
+    "order_id": ["order_id", "order id", "orderid"],
+    "task_name": ["task_name", "task name"],
+    "task_description": ["task_description", "task description"],
+    "state": ["state", "status"],
+    "assigned_Groups": ["assigned_Groups", "assigned groups"],
+}
+
+CLOSED_TASK_STATES = {"done", "completed", "cancelled"}
+
+
+@stage()
 def load_tasks(path: str) -> pd.DataFrame:
     """
     Učitava Tasks sheet iz Operations1 exporta.
     Taskovi se NE sortiraju (redoslijed nije definiran).
     """
 
-    df = pd.read_excel(
+    df = read_cached(path, "tasks-columns", lambda: read_excel_columns(
         path,
-        sheet_name="Tasks"
-    )
+        TASK_COLUMNS,
+        sheet_name="Tasks",
+    ))
 
     # Normalizacija ključa (order_id)
     df["order_id"] = (
@@ -25,3 +45,59 @@ def load_tasks(path: str) -> pd.DataFrame:
             df[col] = df[col].fillna("")
 
     return df
+
+
+@dataclass(frozen=True)
+class TaskIndex:
+    tasks: pd.DataFrame
+    bounds: dict
+    rollup: pd.DataFrame
+    open_by_group: pd.Series
+
+    def tasks_for(self, order_id) -> pd.DataFrame:
+        start, stop = self.bounds.get(order_id, (0, 0))
+        return self.tasks.iloc[start:stop]
+
+    def task_count(self, order_ids: pd.Series) -> pd.Series:
+        return order_ids.map(self.rollup["total_tasks"]).fillna(0).astype(int)
+
+
+@stage()
+def index_tasks(df: pd.DataFrame) -> TaskIndex:
+    """
+    Indeks taskova po order_id.
+
+    - tasks: taskovi sortirani po order_id (stabilno, redoslijed unutar
+      naloga ostaje kao u exportu)
+    - bounds: order_id -> (start, stop) u tasks
+    - rollup: po nalogu ukupno taskova i broj taskova po stanju
+    - open_by_group: otvoreni taskovi po (order_id, assigned_Groups)
+    """
+    tasks = df.sort_values("order_id", kind="mergesort").reset_index(drop=True)
+    order_ids = tasks["order_id"].to_numpy()
+
+    if len(tasks) == 0:
+        starts = np.array([], dtype=int)
+    else:
+        starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])
+    stops = np.r_[starts[1:], len(tasks)].astype(int)
+    keys = order_ids[starts]
+
+    # Jedan prolaz: broj taskova po (nalog, stanje)
+    order_no = np.repeat(np.arange(len(starts)), stops - starts)
+    state_codes, states = pd.factorize(tasks["state"])
+    counts = np.zeros((len(starts), len(states)), dtype=int)
+    np.add.at(counts, (order_no, state_codes), 1)
+
+    rollup = pd.DataFrame(counts, index=pd.Index(keys, name="order_id"), columns=list(states))
+    rollup.insert(0, "total_tasks", stops - starts)
+
+    open_tasks = tasks[~tasks["state"].isin(CLOSED_TASK_STATES)]
+    open_by_group = open_tasks.groupby(["order_id", "assigned_Groups"], sort=False).size()
+
+    return TaskIndex(
+        tasks=tasks,
+        bounds={key: (int(start), int(stop)) for key, start, stop in zip(keys, starts, stops)},
+        rollup=rollup,
+        open_by_group=open_by_group,
+    )
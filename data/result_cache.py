@@ -0,0 +1,202 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+"""
+DATA LAYER - Shared result cache
+
+One cache per process for derived results (prepared spool tables, check
+tables, filtered views, counts), shared by every session and thread.
+
+Responsibilities:
+- Key results by (data version, function, parameters)
+- Keep the total estimated size under a memory budget, evicting the least
+  recently used results first
+- Count hits, misses and evictions
+- Hand out results that callers cannot change for the next reader
+
+Read-only results rely on pandas Copy-on-Write (always on since pandas
+3.0, switched on below for pandas 2.x): every caller gets its own shallow
+copy of a cached frame, and any write to it (new column, .loc assignment,
+in-place method) copies the affected data first. numpy arrays are stored
+with writeable=False.
+
+Budget: SPOOL_RESULT_CACHE_MB (default 512). Results larger than the whole
+budget are returned but not kept.
+
+Architectural rules:
+- No Streamlit imports
+- Cached functions must be pure: same version and parameters, same result
+"""
+
+
+DEFAULT_BUDGET_MB = 512
+BUDGET_ENV = "SPOOL_RESULT_CACHE_MB"
+
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# -----------------------------
+# SIZE / SHARING
+# -----------------------------
+def estimate_size(value) -> int:
+    """Approximate memory held by value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    # Stored once; numpy arrays become read-only in place.
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+def _share(value):
+    # Per caller: a shallow copy, so renaming, adding or assigning columns
+    # never reaches the cached frame.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {k: _share(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_share(v) for v in value)
+    if isinstance(value, list):
+        return [_share(v) for v in value]
+    return value
+
+
+# -----------------------------
+# CACHE
+# -----------------------------
+class ResultCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> (value, size), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # key -> Event of a computation in progress
+        self._pending = {}
+
+    def get_or_compute(self, version, name: str, params: tuple, compute):
+        """
+        Cached result of compute() for (version, name, params). Concurrent
+        callers of the same key wait for one computation.
+        """
+        key = (version, name, params)
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _share(entry[0])
+
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            pending.wait()
+            # Computed (or failed) elsewhere; look again.
+
+        try:
+            value = _freeze(compute())
+            self._store(key, value)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+        return _share(value)
+
+    def _store(self, key, value) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
+
+
+def _budget_bytes() -> int:
+    try:
+        megabytes = float(os.environ.get(BUDGET_ENV, DEFAULT_BUDGET_MB))
+    except ValueError:
+        megabytes = DEFAULT_BUDGET_MB
+    return int(megabytes * 1024 * 1024)
+
+
+results = ResultCache(_budget_bytes())
+
+
+def cached(name: str | None = None):
+    """
+    Decorator: f(dataset, *params) cached in results under
+    (dataset.version, name or f.__name__, params). params must be hashable.
+    """
+    def decorator(func):
+        result_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(dataset, *params):
+            return results.get_or_compute(
+                dataset.version,
+                result_name,
+                params,
+                lambda: func(dataset, *params),
+            )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+"""
+DATA LAYER - Search index
+
+Inverted index over the text of every cell of a frame, and the search
+used by the Work Preparation search box.
+
+Every lowercased cell text is split into all substrings of length 1..3
+(n-grams). Each n-gram maps to the sorted row positions containing it, so
+a search term is answered with a few array intersections instead of a
+str.contains scan over every column.
+
+Architectural rules:
+- No Streamlit imports
+- Same matching rules as the full-frame scan (lowercase substring match
+  on the str() of each cell)
+"""
+
+
+NGRAM_SIZE = 3
+
+# Terms with these characters are regular expressions for str.contains and
+# cannot be answered from the index.
+REGEX_CHARS = set(".^$*+?{}[]\\|()")
+
+
+def search_text(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(series.cat.categories.dtype)
+    return series.fillna("").astype(str).str.lower()
+
+
+def _ngrams(text: str, size: int) -> set:
+    return {
+        text[start:start + length]
+        for length in range(1, size + 1)
+        for start in range(len(text) - length + 1)
+    }
+
+
+def _sorted_unique(positions: np.ndarray) -> np.ndarray:
+    positions = np.sort(positions)
+    keep = np.ones(len(positions), dtype=bool)
+    keep[1:] = positions[1:] != positions[:-1]
+    return positions[keep]
+
+
+def is_plain_term(term: str) -> bool:
+    return not REGEX_CHARS.intersection(term)
+
+
+class SearchIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.labels = df.index
+        self._columns = []
+        postings = {}
+
+        for column in df.columns:
+            codes, uniques = pd.factorize(search_text(df[column]))
+            uniques = list(uniques)
+            self._columns.append((codes, uniques))
+
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+            for code, text in enumerate(uniques):
+                rows = order[bounds[code]:bounds[code + 1]]
+                for gram in _ngrams(text, NGRAM_SIZE):
+                    postings.setdefault(gram, []).append(rows)
+
+        self._postings = {
+            gram: _sorted_unique(np.concatenate(parts))
+            for gram, parts in postings.items()
+        }
+
+    @property
+    def nbytes(self) -> int:
+        # Approximate; used for the shared result cache budget.
+        return int(
+            sum(posting.nbytes for posting in self._postings.values())
+            + sum(codes.nbytes + sum(map(len, uniques)) for codes, uniques in self._columns)
+        )
+
+    def _contains(self, positions: np.ndarray, term: str) -> np.ndarray:
+        found = np.zeros(len(positions), dtype=bool)
+        for codes, uniques in self._columns:
+            candidate_codes = codes[positions]
+            matching = [code for code in np.unique(candidate_codes) if term in uniques[code]]
+            found |= np.isin(candidate_codes, matching)
+        return positions[found]
+
+    def positions(self, term: str):
+        """
+        Row positions whose cell text contains term, or None when the term
+        has to be evaluated as a regular expression.
+        """
+        if not is_plain_term(term):
+            return None
+
+        if len(term) <= NGRAM_SIZE:
+            return self._postings.get(term, np.array([], dtype=int))
+
+        grams = [term[start:start + NGRAM_SIZE] for start in range(len(term) - NGRAM_SIZE + 1)]
+        candidates = None
+        for gram in sorted(set(grams), key=lambda gram: len(self._postings.get(gram, ()))):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return np.array([], dtype=int)
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        return self._contains(candidates, term)
+
+    def labels_matching(self, term: str):
+        positions = self.positions(term)
+        if positions is None:
+            return None
+        return self.labels[positions]
+
+
+def apply_search(df: pd.DataFrame, query: str, index: SearchIndex | None = None) -> pd.DataFrame:
+    """
+    Rows of df where any comma/space separated term of query is contained
+    in the text of any cell. index, built over df or a superset of its
+    rows, answers plain terms without scanning the columns.
+    """
+    if not query:
+        return df
+
+    terms = [
+        t.strip().lower()
+        for t in query.replace(",", " ").split()
+        if t.strip()
+    ]
+
+    mask = pd.Series(False, index=df.index)
+
+    for term in terms:
+        # Index lookup when available, full scan for regex terms.
+        labels = index.labels_matching(term) if index is not None else None
+        if labels is not None:
+            mask |= df.index.isin(labels)
+            continue
+
+        term_mask = pd.Series(False, index=df.index)
+        for col in df.columns:
+            term_mask |= (
+                search_text(df[col])
+                .str.contains(term, na=False)
+            )
+        mask |= term_mask
+
+    return df[mask]
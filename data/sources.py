@@ -0,0 +1,104 @@
+import glob
+from pathlib import Path
+
+import pandas as pd
+"""
+DATA LAYER - Source files
+
+Resolves a configured data source to the export files behind it. A source
+is one of:
+
+    spools.xlsx             a single file
+    exports/spools/         every Excel file directly in the directory
+    exports/*/spools*.xlsx  every Excel file matching the glob pattern
+
+Files of a multi-file source are labelled with their path relative to the
+source root (the directory, or the part of the pattern before the first
+wildcard). Parsed files are combined with concat_sources.
+
+Architectural rules:
+- No Streamlit imports
+- A single-file source is read exactly as before (no source_file column)
+"""
+
+
+SOURCE_FILE_COLUMN = "source_file"
+EXCEL_SUFFIXES = {".xlsx", ".xlsm"}
+
+_GLOB_CHARS = set("*?[")
+
+
+def is_multi_file(source) -> bool:
+    return isinstance(source, dict) or bool(_GLOB_CHARS.intersection(str(source))) or Path(source).is_dir()
+
+
+def source_root(source) -> Path:
+    """Directory a source lives in; derived data (history) is kept there."""
+    text = str(source)
+    if _GLOB_CHARS.intersection(text):
+        parts = Path(text).parts
+        first = next(i for i, part in enumerate(parts) if _GLOB_CHARS.intersection(part))
+        return Path(*parts[:first]) if first else Path(".")
+    path = Path(text)
+    return path if path.is_dir() else path.parent
+
+
+def _is_export(path: Path, root: Path) -> bool:
+    # Excel lock files (~$name.xlsx) and anything in hidden folders, like
+    # the columnar cache and its snapshots, are not exports.
+    relative = path.relative_to(root) if path.is_relative_to(root) else Path(path.name)
+    return (
+        path.is_file()
+        and path.suffix.lower() in EXCEL_SUFFIXES
+        and not path.name.startswith("~$")
+        and not any(part.startswith(".") for part in relative.parts[:-1])
+    )
+
+
+def source_files(source) -> dict:
+    """
+    Label -> path of every file of source, sorted by label. A single file
+    is returned as is (even when missing, so reading it reports the error).
+
+    Raises FileNotFoundError when a directory or pattern has no files.
+    """
+    if isinstance(source, dict):
+        return {label: Path(path) for label, path in sorted(source.items())}
+    if not is_multi_file(source):
+        path = Path(source)
+        return {path.name: path}
+
+    root = source_root(source)
+    if Path(source).is_dir():
+        candidates = Path(source).iterdir()
+    else:
+        candidates = map(Path, glob.glob(str(source), recursive=True))
+
+    files = {
+        path.relative_to(root).as_posix() if path.is_relative_to(root) else path.name: path
+        for path in candidates
+        if _is_export(path, root)
+    }
+    if not files:
+        raise FileNotFoundError(f"No Excel exports found for {source}")
+    return dict(sorted(files.items()))
+
+
+def concat_sources(frames: dict) -> pd.DataFrame:
+    """
+    One frame from label -> frame, with the label in SOURCE_FILE_COLUMN.
+
+    Rows exported identically by more than one file are kept only from
+    the first of those files; repeated rows within one file are left alone.
+    """
+    df = pd.concat(
+        [frame.assign(**{SOURCE_FILE_COLUMN: label}) for label, frame in frames.items()],
+        ignore_index=True,
+    )
+    if len(frames) < 2:
+        return df
+
+    columns = [column for column in df.columns if column != SOURCE_FILE_COLUMN]
+    content = pd.util.hash_pandas_object(df[columns], index=False)
+    first_file = df[SOURCE_FILE_COLUMN].groupby(content.to_numpy(), sort=False).transform("first")
+    return df[df[SOURCE_FILE_COLUMN] == first_file].reset_index(drop=True)
@@ -0,0 +1,238 @@
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from data.cache import CACHE_DIR_NAME
+from data.dataset import DatasetLoadError, SpoolDataset, load_dataset
+from data.delta import SpoolIngestState
+from data.flow import StationFlowStore
+from data.history import SnapshotStore
+from data.sources import is_multi_file, source_files
+"""
+DATA LAYER - Source watcher
+
+Background thread that loads new versions of the data sources before a
+user asks for them.
+
+Responsibilities:
+- Poll the configured source files (size + mtime); for a directory or
+  glob source also the set of files behind it
+- Wait until a changed file has settled (no change for SETTLE_SECONDS)
+- Copy every source to a private snapshot, so Excel or the MES export job
+  can keep writing or locking the original
+- Parse the snapshots and run the checks off the request path
+- Swap the new SpoolDataset in as one reference assignment
+- Record every new spools export in the snapshot history and the
+  station flow, if configured
+
+Sessions read current() and never wait, except for the very first load.
+A failed load keeps the last good dataset and is retried.
+
+Architectural rules:
+- No Streamlit imports
+- Never publishes a partially loaded dataset
+"""
+
+
+POLL_SECONDS = 2.0
+SETTLE_SECONDS = 3.0
+RETRY_SECONDS = 10.0
+SNAPSHOT_DIR_NAME = "snapshots"
+
+
+def _signature(path: Path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _source_signature(source: Path):
+    if not is_multi_file(source):
+        return _signature(source)
+    try:
+        files = source_files(source)
+    except OSError:
+        return None
+    return tuple((label, _signature(path)) for label, path in files.items())
+
+
+def snapshot_path(path) -> Path:
+    path = Path(path)
+    return path.parent / CACHE_DIR_NAME / SNAPSHOT_DIR_NAME / path.name
+
+
+def _snapshot(path: Path) -> Path | dict:
+    if is_multi_file(path):
+        return {label: _snapshot(file) for label, file in source_files(path).items()}
+
+    target = snapshot_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.copy2(path, tmp)
+    os.replace(tmp, target)
+    return target
+
+
+class DatasetWatcher:
+    """
+    Keeps the last good SpoolDataset of data_sources up to date from a
+    daemon thread.
+    """
+
+    def __init__(
+        self,
+        data_sources: dict,
+        ingest: SpoolIngestState | None = None,
+        poll_seconds: float = POLL_SECONDS,
+        settle_seconds: float = SETTLE_SECONDS,
+        retry_seconds: float = RETRY_SECONDS,
+        history: SnapshotStore | None = None,
+        flow: StationFlowStore | None = None,
+    ):
+        self.data_sources = {name: Path(path) for name, path in data_sources.items()}
+        self.ingest = ingest if ingest is not None else SpoolIngestState()
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.retry_seconds = retry_seconds
+        self.history = history
+        self.flow = flow
+
+        self._dataset = None
+        self._loaded_at = None
+        self._error = None
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # name -> (signature, monotonic time it was first seen)
+        self._seen = {}
+        # name -> signature of the files behind the current dataset
+        self._loaded = {}
+        self._retry_at = 0.0
+
+    # -----------------------------
+    # READERS (any thread)
+    # -----------------------------
+    def current(self) -> SpoolDataset | None:
+        return self._dataset
+
+    @property
+    def loaded_at(self):
+        return self._loaded_at
+
+    @property
+    def error(self):
+        """Exception of the last failed load, None after a good load."""
+        return self._error
+
+    def wait_for_dataset(self, timeout: float | None = None) -> SpoolDataset:
+        """
+        Current dataset; blocks only until the first load has finished.
+        Raises the load error (DatasetLoadError) when there is no good
+        dataset at all.
+        """
+        self._ready.wait(timeout)
+        dataset = self._dataset
+        if dataset is None:
+            if self._error is not None:
+                raise self._error
+            raise TimeoutError("Data sources are still loading.")
+        return dataset
+
+    # -----------------------------
+    # THREAD
+    # -----------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spool-source-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.poll_seconds)
+
+    def poll(self) -> bool:
+        """
+        One watch cycle. Returns True when a new dataset was published.
+        """
+        now = time.monotonic()
+        changed = []
+
+        for name, path in self.data_sources.items():
+            signature = _source_signature(path)
+            if name not in self._seen or self._seen[name][0] != signature:
+                self._seen[name] = (signature, now)
+            if self._dataset is None or signature != self._loaded.get(name):
+                changed.append(name)
+
+        if not changed or now < self._retry_at:
+            return False
+        # The first load does not wait for the files to settle.
+        if self._dataset is not None and any(
+            now - self._seen[name][1] < self.settle_seconds for name in changed
+        ):
+            return False
+
+        return self._refresh({name: self._seen[name][0] for name in self.data_sources})
+
+    def _refresh(self, signatures: dict) -> bool:
+        try:
+            snapshots = {}
+            errors = {}
+            for name, path in self.data_sources.items():
+                try:
+                    snapshots[name] = _snapshot(path)
+                except OSError as error:
+                    errors[name] = error
+            if errors:
+                raise DatasetLoadError(errors)
+
+            # A source written during the copy is not settled yet.
+            if any(_source_signature(path) != signatures[name] for name, path in self.data_sources.items()):
+                return False
+
+            dataset = load_dataset(snapshots, ingest=self.ingest)
+        except Exception as error:
+            # Callers handle DatasetLoadError only; anything else from the
+            # load is reported the same way instead of as a traceback.
+            if not isinstance(error, DatasetLoadError):
+                error = DatasetLoadError({"data sources": error})
+            self._error = error
+            self._retry_at = time.monotonic() + self.retry_seconds
+            if self._dataset is None:
+                self._ready.set()
+            return False
+
+        self._loaded = signatures
+        self._error = None
+        self._loaded_at = time.time()
+        self._dataset = dataset
+        self._ready.set()
+
+        # History is best effort and never holds back a new dataset.
+        ingested_at = datetime.now(timezone.utc)
+        if self.history is not None:
+            fingerprints = {name: fingerprint for name, _, fingerprint in dataset.version}
+            try:
+                self.history.record(self.ingest.spools, fingerprints["spools"], ingested_at=ingested_at)
+            except (ImportError, OSError, ValueError):
+                pass
+        if self.flow is not None:
+            try:
+                self.flow.update(self.ingest.spools, ingested_at)
+            except (ImportError, OSError, ValueError):
+                pass
+
+        return True
@@ -0,0 +1,271 @@
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+"""
+INSTRUMENTATION - Stage timings
+
+Records wall time, row counts and peak traced memory of named stages
+(loaders, check builders, render functions) and groups them per rerun.
+
+Enabled with the environment variable SPOOL_INSTRUMENTATION=1.
+- SPOOL_INSTRUMENTATION_MEMORY=0 turns off tracemalloc (timings only)
+- SPOOL_INSTRUMENTATION_LOG sets the JSONL log file
+  (default logs/instrumentation.jsonl, rotated at LOG_MAX_BYTES)
+
+When disabled, a wrapped stage costs one flag check.
+
+Memory is measured with tracemalloc (Python and numpy/pandas buffers,
+not Arrow memory). tracemalloc is process-wide, so peaks of concurrent
+sessions overlap.
+
+Architectural rules:
+- No Streamlit imports
+- Never changes the result or the exceptions of a wrapped stage
+"""
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_LOG_PATH = ROOT / "logs" / "instrumentation.jsonl"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+HISTORY_SIZE = 20
+
+_config = {
+    "enabled": False,
+    "memory": False,
+}
+_local = threading.local()
+_history = deque(maxlen=HISTORY_SIZE)
+_history_lock = threading.Lock()
+_logger = logging.getLogger("spool_tracking.instrumentation")
+_logger.propagate = False
+
+
+def enabled() -> bool:
+    return _config["enabled"]
+
+
+def configure(enable: bool, memory: bool = True, log_path=DEFAULT_LOG_PATH) -> None:
+    _config["enabled"] = enable
+    _config["memory"] = enable and memory
+
+    if _config["memory"] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _config["memory"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+
+    if enable and log_path is not None:
+        try:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                log_path,
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUP_COUNT,
+                encoding="utf-8",
+            )
+        except OSError:
+            return
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+
+
+def configure_from_env() -> None:
+    configure(
+        os.environ.get("SPOOL_INSTRUMENTATION", "").strip().lower() in {"1", "true", "yes"},
+        memory=os.environ.get("SPOOL_INSTRUMENTATION_MEMORY", "1").strip() != "0",
+        log_path=os.environ.get("SPOOL_INSTRUMENTATION_LOG") or DEFAULT_LOG_PATH,
+    )
+
+
+# -----------------------------
+# ROW COUNTS
+# -----------------------------
+def _rows(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, tuple):
+        counts = [_rows(item) for item in value]
+        counts = [count for count in counts if count is not None]
+        return counts or None
+    spools = getattr(value, "spools", None)
+    if isinstance(spools, pd.DataFrame):
+        return len(spools)
+    return None
+
+
+def _input_rows(args, kwargs):
+    for value in list(args) + list(kwargs.values()):
+        rows = _rows(value)
+        if rows is not None and not isinstance(value, tuple):
+            return rows
+    return None
+
+
+# -----------------------------
+# RECORDING
+# -----------------------------
+def _stack() -> list:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# tracemalloc has a single peak counter. Every stage resets it on entry, so
+# the peak seen so far is first handed to the enclosing stage (or rerun).
+def _parent_memory(stack: list):
+    if stack:
+        return stack[-1]["memory"]
+    run = getattr(_local, "run", None)
+    return None if run is None else run["memory"]
+
+
+def _memory_enter(stack: list):
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    parent = _parent_memory(stack)
+    if parent is not None:
+        parent["peak"] = max(parent["peak"], peak)
+    tracemalloc.reset_peak()
+    return {"start": current, "peak": current}
+
+
+def _memory_exit(stack: list, memory):
+    if memory is None or not tracemalloc.is_tracing():
+        return None
+    _, peak = tracemalloc.get_traced_memory()
+    peak = max(memory["peak"], peak)
+    parent = _parent_memory(stack)
+    if parent is not None:
+        parent["peak"] = max(parent["peak"], peak)
+    return peak - memory["start"]
+
+
+@contextmanager
+def measure(name: str, rows=None):
+    """
+    Record the enclosed block as stage name. rows is the input row count,
+    if known.
+    """
+    if not _config["enabled"]:
+        yield
+        return
+
+    stack = _stack()
+    entry = {"memory": _memory_enter(stack)}
+    stack.append(entry)
+    record = {"stage": name, "depth": len(stack) - 1, "rows_in": rows}
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run["stages"].append(record)
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        stack.pop()
+        peak = _memory_exit(stack, entry["memory"])
+        record["peak_kib"] = None if peak is None else round(peak / 1024, 1)
+
+        if run is None and not stack:
+            _log({"kind": "stage", "time": _now(), **record})
+
+
+def stage(name: str | None = None):
+    """
+    Decorator recording every call of the function as a stage, with the
+    row count of the first frame argument and of the result.
+    """
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _config["enabled"]:
+                return function(*args, **kwargs)
+
+            with measure(label, _input_rows(args, kwargs)) as record:
+                result = function(*args, **kwargs)
+                record["rows_out"] = _rows(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# -----------------------------
+# RERUNS
+# -----------------------------
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _log(record: dict) -> None:
+    if _logger.handlers:
+        _logger.info(json.dumps(record, default=str))
+
+
+def start_rerun(name: str = "rerun") -> None:
+    if not _config["enabled"]:
+        return
+
+    _local.stack = []
+    _local.run = None
+    memory = _memory_enter([])
+    _local.run = {
+        "kind": "rerun",
+        "name": name,
+        "time": _now(),
+        "started": time.perf_counter(),
+        "memory": memory,
+        "stages": [],
+    }
+
+
+def finish_rerun():
+    """
+    Close the current rerun, log it and return its record (None when
+    disabled or no rerun was started in this thread).
+    """
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None:
+        return None
+
+    run["wall_ms"] = round((time.perf_counter() - run.pop("started")) * 1000, 3)
+    peak = _memory_exit([], run.pop("memory"))
+    run["peak_kib"] = None if peak is None else round(peak / 1024, 1)
+
+    with _history_lock:
+        _history.append(run)
+    _log(run)
+    return run
+
+
+def history() -> list:
+    """Last HISTORY_SIZE finished reruns, oldest first."""
+    with _history_lock:
+        return list(_history)
+
+
+configure_from_env()
@@ -1,4 +1,10 @@
-﻿import streamlit as st
+﻿import io
+import os
+from pathlib import Path
+
+import streamlit as st
+
+from data.cache import CACHE_DIR_NAME
 
 # --------------------------------------------------
 # STATION IMAGES
@@ -33,10 +39,54 @@ STATION_LABELS = {
 
 STATIONS_ORDER = list(STATION_LABELS.keys())
 
+# Station images are 1024 px PNGs shown in eleven narrow columns.
+STATION_IMAGE_WIDTH = 320
+THUMBNAIL_DIR = Path(CACHE_DIR_NAME) / "thumbnails"
+
+
+@st.cache_resource
+def load_station_image(image_path):
+    """
+    JPEG thumbnail of a station image.
+
+    st.image passes JPEG bytes through unchanged, instead of decoding and
+    re-encoding the full-size PNG on every rerun. Thumbnails are kept next
+    to the images, so only the first start after an image change pays
+    for the decode.
+    """
+    source = Path(image_path)
+    stat = source.stat()
+    thumbnail = source.parent / THUMBNAIL_DIR / f"{source.stem}-{STATION_IMAGE_WIDTH}-{stat.st_size}-{stat.st_mtime_ns}.jpg"
+
+    try:
+        return thumbnail.read_bytes()
+    except OSError:
+        pass
+
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        image.thumbnail((STATION_IMAGE_WIDTH, STATION_IMAGE_WIDTH))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+    data = buffer.getvalue()
+
+    try:
+        thumbnail.parent.mkdir(parents=True, exist_ok=True)
+        tmp = thumbnail.with_name(thumbnail.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, thumbnail)
+    except OSError:
+        pass
+
+    return data
+
+
 # --------------------------------------------------
 # SINGLE STATION BLOCK
 # --------------------------------------------------
-def draw_station(internal_name, spool_counts, red_label_counts):
+def draw_station(internal_name, spool_counts, red_label_counts, key):
     # CSS injected every rerun (safe)
     st.markdown(
         """
@@ -69,11 +119,11 @@ def draw_station(internal_name, spool_counts, red_label_counts):
     image_path = STATION_IMAGES[label]
 
     # IMAGE
-    st.image(image_path, use_container_width=True)
+    st.image(load_station_image(image_path), use_container_width=True, output_format="JPEG")
 
     # CLICKABLE STATION BADGE
-    if st.button(label, key=f"station_{internal_name}", use_container_width=True):
-        st.session_state.selected_station = internal_name
+    if st.button(label, key=f"{key}_station_{internal_name}", use_container_width=True):
+        st.session_state[f"{key}_selected_station"] = internal_name
 
     # SPACING
     st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
@@ -120,11 +170,13 @@ def draw_station(internal_name, spool_counts, red_label_counts):
 # --------------------------------------------------
 # SHOPFLOOR LAYOUT (ONE ROW)
 # --------------------------------------------------
-def draw_shopfloor(spool_counts, red_label_counts):
+def draw_shopfloor(spool_counts, red_label_counts, key):
+    # key prefixes the station buttons; the clicked station is kept in
+    # st.session_state[f"{key}_selected_station"].
     st.subheader("🏭 Shopfloor layout")
 
     cols = st.columns(len(STATIONS_ORDER))
 
     for col, station in zip(cols, STATIONS_ORDER):
         with col:
-            draw_station(station, spool_counts, red_label_counts)
+            draw_station(station, spool_counts, red_label_counts, key)
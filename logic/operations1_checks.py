@@ -1,4 +1,7 @@
-﻿import pandas as pd
+﻿import numpy as np
+import pandas as pd
+
+from instrumentation.stages import stage
 
 STATUS_GROUPS = {
     "cancelled": "cancelled",
@@ -25,7 +28,10 @@ def normalize_status_group(status: str) -> str:
 def add_operations1_columns(df: pd.DataFrame) -> pd.DataFrame:
     result = df.copy()
 
-    result["state_group"] = result["state"].apply(normalize_status_group)
+    # Map every distinct status once instead of every row.
+    codes, uniques = pd.factorize(result["state"])
+    groups = np.array([normalize_status_group(value) for value in uniques] + ["unknown"], dtype=object)
+    result["state_group"] = groups[codes]
     result["is_real_spool"] = result["var_ISOworkbookId"].fillna("").astype(str).str.strip().ne("")
 
     today = pd.Timestamp.today().normalize()
@@ -37,11 +43,27 @@ def add_operations1_columns(df: pd.DataFrame) -> pd.DataFrame:
     return result
 
 
+CHECK_COLUMNS = [
+    "severity",
+    "category",
+    "check",
+    "sheet_no",
+    "revisions",
+    "statuses",
+    "stations",
+    "row_count",
+    "message",
+]
+
+
+@stage()
 def build_operations1_checks(df: pd.DataFrame) -> pd.DataFrame:
     normalized = add_operations1_columns(df)
+    is_real_spool = normalized["is_real_spool"].to_numpy()
+    state_group = normalized["state_group"].to_numpy()
     rows = []
 
-    missing_sheet = normalized[~normalized["is_real_spool"]]
+    missing_sheet = normalized[~is_real_spool]
     if not missing_sheet.empty:
         rows.append(_check_row(
             severity="High",
@@ -55,7 +77,7 @@ def build_operations1_checks(df: pd.DataFrame) -> pd.DataFrame:
             message="Rows without ISO/sheet number cannot be tracked as spools.",
         ))
 
-    unknown_status = normalized[normalized["state_group"].eq("unknown")]
+    unknown_status = normalized[state_group == "unknown"]
     if not unknown_status.empty:
         rows.append(_check_row(
             severity="Medium",
@@ -69,84 +91,111 @@ def build_operations1_checks(df: pd.DataFrame) -> pd.DataFrame:
             message="Status is not in the normalized Operations1 status list.",
         ))
 
-    spool_rows = normalized[normalized["is_real_spool"]].copy()
-
-    for (sheet_no, revision), group in spool_rows.groupby(
-        ["var_ISOworkbookId", "var_ex_internal_rev"], dropna=False
-    ):
-        open_rows = group[group["state_group"].isin(OPEN_GROUPS)]
-        if len(open_rows) > 1:
-            rows.append(_check_row(
-                severity="High",
-                category="Duplicate",
-                check="Same revision open more than once",
-                sheet_no=sheet_no,
-                revisions=revision,
-                statuses=_format_values(open_rows["state"]),
-                stations=_format_values(open_rows["class_Station"]),
-                row_count=len(open_rows),
-                message="Same sheet number and internal revision has multiple non-closed/non-cancelled rows.",
-            ))
-
-    for sheet_no, group in spool_rows.groupby("var_ISOworkbookId", dropna=False):
-        open_rows = group[group["state_group"].isin(OPEN_GROUPS)]
-        open_revisions = sorted(
-            rev for rev in open_rows["var_ex_internal_rev"].dropna().astype(str).unique() if rev
+    spool_rows = normalized[is_real_spool]
+    spool_groups = state_group[is_real_spool]
+    is_open = np.isin(spool_groups, list(OPEN_GROUPS))
+    is_history = np.isin(spool_groups, ["cancelled", "closed"])
+    open_rows = spool_rows[is_open]
+
+    # -----------------------------
+    # SAME REVISION OPEN MORE THAN ONCE
+    # -----------------------------
+    revision_groups = spool_rows.groupby(["var_ISOworkbookId", "var_ex_internal_rev"], dropna=False)
+    revision_keys = revision_groups.size().index
+    revision_ids = revision_groups.ngroup().to_numpy()
+    open_revision_ids = revision_ids[is_open]
+
+    open_count = np.bincount(open_revision_ids, minlength=len(revision_keys))
+    same_revision = open_count > 1
+
+    same_revision_rows = _check_rows(
+        same_revision,
+        severity="High",
+        category="Duplicate",
+        check="Same revision open more than once",
+        sheet_no=revision_keys.get_level_values(0),
+        revisions=revision_keys.get_level_values(1),
+        statuses=_format_group_values(open_revision_ids, open_rows["state"], len(revision_keys)),
+        stations=_format_group_values(open_revision_ids, open_rows["class_Station"], len(revision_keys)),
+        row_count=open_count,
+        message="Same sheet number and internal revision has multiple non-closed/non-cancelled rows.",
+    )
+
+    # -----------------------------
+    # PER SHEET NUMBER
+    # -----------------------------
+    sheet_groups = spool_rows.groupby("var_ISOworkbookId", dropna=False)
+    sheet_sizes = sheet_groups.size()
+    sheet_keys = sheet_sizes.index
+    sheet_ids = sheet_groups.ngroup().to_numpy()
+    open_sheet_ids = sheet_ids[is_open]
+    sheet_count = len(sheet_keys)
+
+    row_count = sheet_sizes.to_numpy()
+    open_count = np.bincount(open_sheet_ids, minlength=sheet_count)
+    history_count = np.bincount(sheet_ids[is_history], minlength=sheet_count)
+
+    open_revisions = _format_group_values(open_sheet_ids, open_rows["var_ex_internal_rev"], sheet_count, strip=False)
+    open_revision_count = _count_group_values(open_sheet_ids, open_rows["var_ex_internal_rev"], sheet_count)
+
+    revisions = _format_group_values(sheet_ids, spool_rows["var_ex_internal_rev"], sheet_count)
+    statuses = _format_group_values(sheet_ids, spool_rows["state"], sheet_count)
+    stations = _format_group_values(sheet_ids, spool_rows["class_Station"], sheet_count)
+
+    # Per sheet number the revision check comes first, then at most one
+    # of the two duplicate checks.
+    per_sheet = [_check_rows(
+        open_revision_count > 1,
+        severity="High",
+        category="Revision",
+        check="Multiple open revisions",
+        sheet_no=sheet_keys,
+        revisions=open_revisions,
+        statuses=_format_group_values(open_sheet_ids, open_rows["state"], sheet_count),
+        stations=_format_group_values(open_sheet_ids, open_rows["class_Station"], sheet_count),
+        row_count=open_count,
+        message="Same sheet number has more than one internal revision still open.",
+        order=np.arange(sheet_count) * 2,
+    ), _check_rows(
+        (row_count > 1) & (open_count == 0),
+        severity="Info",
+        category="Duplicate",
+        check="Duplicate only in closed/cancelled rows",
+        sheet_no=sheet_keys,
+        revisions=revisions,
+        statuses=statuses,
+        stations=stations,
+        row_count=row_count,
+        message="Repeated sheet number exists only in closed or cancelled rows.",
+        order=np.arange(sheet_count) * 2 + 1,
+    ), _check_rows(
+        (row_count > 1) & (open_count > 0) & (history_count > 0),
+        severity="Info",
+        category="Duplicate",
+        check="Open row with closed/cancelled history",
+        sheet_no=sheet_keys,
+        revisions=revisions,
+        statuses=statuses,
+        stations=stations,
+        row_count=row_count,
+        message="Sheet number repeats, but at least one row is closed or cancelled. Review only if unexpected.",
+        order=np.arange(sheet_count) * 2 + 1,
+    )]
+    order = np.argsort(np.concatenate([part.pop("order") for part in per_sheet]), kind="stable")
+
+    columns = {}
+    for column in CHECK_COLUMNS:
+        per_sheet_values = np.concatenate([part[column] for part in per_sheet])[order]
+        columns[column] = (
+            [row[column] for row in rows]
+            + same_revision_rows[column].tolist()
+            + per_sheet_values.tolist()
         )
-        if len(open_revisions) > 1:
-            rows.append(_check_row(
-                severity="High",
-                category="Revision",
-                check="Multiple open revisions",
-                sheet_no=sheet_no,
-                revisions=", ".join(open_revisions),
-                statuses=_format_values(open_rows["state"]),
-                stations=_format_values(open_rows["class_Station"]),
-                row_count=len(open_rows),
-                message="Same sheet number has more than one internal revision still open.",
-            ))
-
-        if len(group) > 1 and open_rows.empty:
-            rows.append(_check_row(
-                severity="Info",
-                category="Duplicate",
-                check="Duplicate only in closed/cancelled rows",
-                sheet_no=sheet_no,
-                revisions=_format_values(group["var_ex_internal_rev"]),
-                statuses=_format_values(group["state"]),
-                stations=_format_values(group["class_Station"]),
-                row_count=len(group),
-                message="Repeated sheet number exists only in closed or cancelled rows.",
-            ))
-        elif len(group) > 1:
-            cancelled_or_closed = group[group["state_group"].isin({"cancelled", "closed"})]
-            if not cancelled_or_closed.empty:
-                rows.append(_check_row(
-                    severity="Info",
-                    category="Duplicate",
-                    check="Open row with closed/cancelled history",
-                    sheet_no=sheet_no,
-                    revisions=_format_values(group["var_ex_internal_rev"]),
-                    statuses=_format_values(group["state"]),
-                    stations=_format_values(group["class_Station"]),
-                    row_count=len(group),
-                    message="Sheet number repeats, but at least one row is closed or cancelled. Review only if unexpected.",
-                ))
-
-    if not rows:
-        return pd.DataFrame(columns=[
-            "severity",
-            "category",
-            "check",
-            "sheet_no",
-            "revisions",
-            "statuses",
-            "stations",
-            "row_count",
-            "message",
-        ])
-
-    return pd.DataFrame(rows)
+
+    if not columns["severity"]:
+        return pd.DataFrame(columns=CHECK_COLUMNS)
+
+    return pd.DataFrame(columns)
 
 
 def filter_checks_for_spools(checks: pd.DataFrame, df_view: pd.DataFrame) -> pd.DataFrame:
@@ -173,6 +222,61 @@ def _check_row(severity, category, check, sheet_no, revisions, statuses, station
     }
 
 
+def _check_rows(mask, order=None, **columns) -> dict:
+    """
+    Column arrays of the check rows selected by mask. Scalar values are
+    repeated for every selected row.
+    """
+    count = int(mask.sum())
+    rows = {}
+    for column, values in columns.items():
+        if np.ndim(values) == 0:
+            rows[column] = np.full(count, values, dtype=object)
+        else:
+            rows[column] = np.asarray(values, dtype=object)[mask]
+    if order is not None:
+        rows["order"] = order[mask]
+    return rows
+
+
+def _group_value_pairs(group_ids: np.ndarray, series: pd.Series, strip: bool = True) -> pd.DataFrame:
+    present = series.notna().to_numpy()
+    values = series[present].astype(str)
+    if strip:
+        values = values.str.strip()
+    values = values.to_numpy(dtype=object)
+    non_empty = values != ""
+
+    return pd.DataFrame({
+        "group": group_ids[present][non_empty],
+        "value": values[non_empty],
+    }).drop_duplicates()
+
+
+def _format_group_values(group_ids: np.ndarray, series: pd.Series, group_count: int, strip: bool = True) -> np.ndarray:
+    """
+    _format_values of series for every group at once. group_ids holds the
+    group number (0..group_count-1) of each row of series.
+    """
+    formatted = np.full(group_count, "", dtype=object)
+    pairs = _group_value_pairs(group_ids, series, strip).sort_values(["group", "value"], kind="mergesort")
+    if pairs.empty:
+        return formatted
+
+    groups = pairs["group"].to_numpy()
+    values = pairs["value"].tolist()
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], len(groups)]
+
+    formatted[groups[starts]] = [", ".join(values[start:end]) for start, end in zip(starts, ends)]
+    return formatted
+
+
+def _count_group_values(group_ids: np.ndarray, series: pd.Series, group_count: int) -> np.ndarray:
+    pairs = _group_value_pairs(group_ids, series, strip=False)
+    return np.bincount(pairs["group"].to_numpy(dtype=int), minlength=group_count)
+
+
 def _format_values(series: pd.Series) -> str:
     values = sorted(
         value for value in series.dropna().astype(str).str.strip().unique() if value
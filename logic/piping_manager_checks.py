@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation.stages import stage
+"""
+LOGIC LAYER - Piping Manager checks
+
+Joins the Piping Manager weekly report onto the spools and evaluates the
+PM rules (part list state, AV READY week, station) for every spool.
+
+Architectural rules:
+- No Streamlit imports
+- evaluate_piping_manager_row is the reference for the column-wise rules
+"""
+
+
+@stage()
+def add_piping_manager_columns(df, pm_df, dataset=None):
+    result = df.copy()
+    pm_lookup = pm_df.set_index("var_ISOworkbookId")
+
+    result["pm_part_list_state"] = result["var_ISOworkbookId"].map(pm_lookup["pm_part_list_state"]).fillna("")
+    result["pm_av_ready_week"] = result["var_ISOworkbookId"].map(pm_lookup["pm_av_ready_week"]).fillna("")
+    result["pm_match_status"] = np.where(
+        result["pm_part_list_state"].ne(""),
+        "Matched",
+        "Missing in Piping Manager",
+    )
+
+    if dataset is not None and dataset.ingest is not None:
+        # Only rows changed by the last export (or PM file) are re-evaluated.
+        pm_checks = dataset.ingest.reuse_rows(
+            "pm_checks",
+            result,
+            evaluate_piping_manager_checks,
+            PM_INPUT_COLUMNS,
+        )
+    else:
+        pm_checks = evaluate_piping_manager_checks(result)
+    result["pm_check_severity"] = pm_checks[0]
+    result["pm_check_category"] = pm_checks[1]
+    result["pm_check"] = pm_checks[2]
+    result["pm_action"] = pm_checks[3]
+
+    return result
+
+
+PM_RULES = [
+    # (severity, category, check, action)
+    (
+        "High",
+        "Missing in PM",
+        "Missing in Piping Manager",
+        "Workbook from Operations1 was not found in Piping Manager.",
+    ),
+    (
+        "Medium",
+        "PM Hold",
+        "Part list on hold",
+        "Review hold status in Piping Manager.",
+    ),
+    (
+        "High",
+        "AV Week Missing",
+        "Missing AV READY KW",
+        "Material tested/reserved, but Piping Manager AV READY KW is empty.",
+    ),
+    (
+        "OK",
+        "OK",
+        "Material tested/reserved - AV week OK",
+        "No action.",
+    ),
+    (
+        "Medium",
+        "AV Week Mismatch",
+        "AV week mismatch",
+        "Operations1 start week does not match Piping Manager AV READY KW.",
+    ),
+    (
+        "Medium",
+        "Status/Station",
+        "Fully planned but still in Work Preparation",
+        "State 2 should be at PPS or past PPS, not Work Preparation.",
+    ),
+    (
+        "OK",
+        "OK",
+        "Fully planned - station OK",
+        "No action.",
+    ),
+]
+
+PM_INPUT_COLUMNS = [
+    "pm_part_list_state",
+    "class_Station",
+    "start_year_week",
+    "pm_av_ready_week",
+]
+
+# Columns shown for spools with a PM issue.
+PM_ISSUE_COLUMNS = [
+    "var_ISOworkbookId",
+    "var_ex_internal_rev",
+    "var_workBookType",
+    "state",
+    "class_Station",
+    "start_year_week",
+    "pm_part_list_state",
+    "pm_av_ready_week",
+    "pm_check_category",
+    "pm_check",
+    "pm_action",
+]
+
+PM_DEFAULT_RULE = (
+    "OK",
+    "OK",
+    "No PM rule for this state",
+    "No action.",
+)
+
+
+def _pm_text(df, column):
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    return values.fillna("").astype(str).str.strip()
+
+
+@stage()
+def evaluate_piping_manager_checks(df):
+    """
+    Column-wise version of evaluate_piping_manager_row.
+    Returns the (severity, category, check, action) columns for all rows.
+    """
+    state = _pm_text(df, "pm_part_list_state")
+    station = _pm_text(df, "class_Station")
+    mes_week = _pm_text(df, "start_year_week")
+    pm_week = _pm_text(df, "pm_av_ready_week")
+
+    material_ready = state.isin({"15", "16"})
+    week_ok = mes_week.ne("") & mes_week.ne("No start date") & mes_week.eq(pm_week)
+
+    # Same order as the branches in evaluate_piping_manager_row.
+    conditions = [
+        state.eq(""),
+        state.eq("5"),
+        material_ready & pm_week.eq(""),
+        material_ready & week_ok,
+        material_ready,
+        state.eq("2") & station.eq("Work Preparation"),
+        state.eq("2"),
+    ]
+    conditions = [condition.to_numpy(dtype=bool) for condition in conditions]
+
+    return pd.DataFrame({
+        position: np.select(
+            conditions,
+            [rule[position] for rule in PM_RULES],
+            PM_DEFAULT_RULE[position],
+        )
+        for position in range(4)
+    }, index=df.index)
+
+
+def evaluate_piping_manager_row(row):
+    # Reference implementation of the PM rules, one row at a time.
+    # The app uses evaluate_piping_manager_checks; the two are compared in
+    # tests/test_piping_manager_checks.py.
+    state = str(row.get("pm_part_list_state", "")).strip()
+    station = str(row.get("class_Station", "")).strip()
+    mes_week = str(row.get("start_year_week", "")).strip()
+    pm_week = str(row.get("pm_av_ready_week", "")).strip()
+
+    if not state:
+        return (
+            "High",
+            "Missing in PM",
+            "Missing in Piping Manager",
+            "Workbook from Operations1 was not found in Piping Manager.",
+        )
+
+    if state == "5":
+        return (
+            "Medium",
+            "PM Hold",
+            "Part list on hold",
+            "Review hold status in Piping Manager.",
+        )
+
+    if state in {"15", "16"}:
+        if not pm_week:
+            return (
+                "High",
+                "AV Week Missing",
+                "Missing AV READY KW",
+                "Material tested/reserved, but Piping Manager AV READY KW is empty.",
+            )
+        if mes_week and mes_week != "No start date" and mes_week == pm_week:
+            return (
+                "OK",
+                "OK",
+                "Material tested/reserved - AV week OK",
+                "No action.",
+            )
+        return (
+            "Medium",
+            "AV Week Mismatch",
+            "AV week mismatch",
+            "Operations1 start week does not match Piping Manager AV READY KW.",
+        )
+
+    if state == "2":
+        if station == "Work Preparation":
+            return (
+                "Medium",
+                "Status/Station",
+                "Fully planned but still in Work Preparation",
+                "State 2 should be at PPS or past PPS, not Work Preparation.",
+            )
+        return (
+            "OK",
+            "OK",
+            "Fully planned - station OK",
+            "No action.",
+        )
+
+    return (
+        "OK",
+        "OK",
+        "No PM rule for this state",
+        "No action.",
+    )
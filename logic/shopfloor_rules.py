@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from instrumentation.stages import stage
+
 STATIONS = [
     "Work Preparation",
     "PPS",
@@ -99,28 +102,87 @@ def evaluate_heat_map(quality, pressure):
     return red_label, hold_possible
 
 
-def calculate_inspection_load(spools_df: pd.DataFrame):
-    inspection_load = {
-        station: {"WITNESS": 0, "HOLD": 0}
-        for station in STATIONS
-    }
+QUALITY_CLASSES = ["Q1", "Q2", "Q3"]
+PRESSURE_RISKS = ["I", "II", "III"]
+
+# (quality, pressure) -> red_label, hold_possible
+# Combinations outside the table are neither red label nor hold.
+HEAT_MAP = pd.DataFrame(
+    [
+        (quality, pressure, *evaluate_heat_map(quality, pressure))
+        for quality in QUALITY_CLASSES
+        for pressure in PRESSURE_RISKS
+    ],
+    columns=["quality_class", "pressure_risk", "red_label", "hold_possible"],
+).set_index(["quality_class", "pressure_risk"])
+
+# spool type x station incidence of ROUTES_BY_SPOOL_TYPE
+ROUTE_MATRIX = pd.DataFrame(
+    [
+        [int(station in route) for station in STATIONS]
+        for route in ROUTES_BY_SPOOL_TYPE.values()
+    ],
+    index=list(ROUTES_BY_SPOOL_TYPE),
+    columns=STATIONS,
+)
 
-    for _, spool in spools_df.iterrows():
-        spool_type = spool.get("var_workBookType")
-        quality = spool.get("quality_class")
-        pressure = spool.get("pressure_risk")
+_WITNESS = np.array([station in WITNESS_STATIONS for station in STATIONS], dtype=int)
+_HOLD = np.array([station in HOLD_STATIONS for station in STATIONS], dtype=int)
 
-        if spool_type not in ROUTES_BY_SPOOL_TYPE:
-            continue
+# Red label spools without hold get a WITNESS at every witness station on
+# their route. Hold spools get a HOLD at hold stations instead.
+WITNESS_MATRIX = ROUTE_MATRIX * _WITNESS
+HOLD_WITNESS_MATRIX = ROUTE_MATRIX * (_WITNESS * (1 - _HOLD))
+HOLD_MATRIX = ROUTE_MATRIX * _HOLD
 
-        red_label, hold_possible = evaluate_heat_map(quality, pressure)
-        if not red_label:
-            continue
 
-        for station in ROUTES_BY_SPOOL_TYPE[spool_type]:
-            if hold_possible and station in HOLD_STATIONS:
-                inspection_load[station]["HOLD"] += 1
-            elif station in WITNESS_STATIONS:
-                inspection_load[station]["WITNESS"] += 1
+def _column_or_none(df: pd.DataFrame, column: str) -> pd.Series:
+    if column in df.columns:
+        return df[column]
+    return pd.Series(None, index=df.index, dtype=object)
 
-    return inspection_load
+
+def workbooks_per_station(spools_df: pd.DataFrame) -> pd.Series:
+    """Distinct ISO workbooks per station (stations without spools omitted)."""
+    return (
+        spools_df.groupby("class_Station", observed=True)["var_ISOworkbookId"]
+        .nunique()
+    )
+
+
+@stage()
+def calculate_inspection_load(spools_df: pd.DataFrame):
+    spool_types = _column_or_none(spools_df, "var_workBookType")
+    routed = spool_types.isin(ROUTE_MATRIX.index).to_numpy()
+
+    heat_map = HEAT_MAP.reindex(
+        pd.MultiIndex.from_arrays([
+            _column_or_none(spools_df, "quality_class")[routed].to_numpy(dtype=object),
+            _column_or_none(spools_df, "pressure_risk")[routed].to_numpy(dtype=object),
+        ])
+    ).fillna(False).astype(bool)
+
+    red_label = heat_map["red_label"].to_numpy()
+    hold_possible = heat_map["hold_possible"].to_numpy()
+
+    spools_per_type = (
+        pd.DataFrame({
+            "spool_type": spool_types[routed].to_numpy(dtype=object),
+            "witness": red_label & ~hold_possible,
+            "hold": red_label & hold_possible,
+        })
+        .groupby("spool_type")
+        .sum()
+        .reindex(ROUTE_MATRIX.index, fill_value=0)
+    )
+
+    witness = (
+        spools_per_type["witness"].to_numpy() @ WITNESS_MATRIX.to_numpy()
+        + spools_per_type["hold"].to_numpy() @ HOLD_WITNESS_MATRIX.to_numpy()
+    )
+    hold = spools_per_type["hold"].to_numpy() @ HOLD_MATRIX.to_numpy()
+
+    return {
+        station: {"WITNESS": int(witness[i]), "HOLD": int(hold[i])}
+        for i, station in enumerate(STATIONS)
+    }
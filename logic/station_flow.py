@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation.stages import stage
+from logic.shopfloor_rules import STATIONS
+"""
+LOGIC LAYER - Station flow
+
+Station transitions, dwell times and throughput derived from consecutive
+spools exports.
+
+A spool is "at" a station while it is active (not archived) and its
+class_Station is one of STATIONS. Between two exports a spool that
+changed station (or disappeared / was archived) leaves its old station,
+and a spool that appeared at a station enters it. A stay is the time from
+the export where a spool was first seen at a station to the export where
+it was first seen elsewhere, so dwell times have the resolution of the
+export interval.
+
+Stays already open in the first export have an unknown entry time; they
+are marked censored and left out of the dwell percentiles.
+
+Architectural rules:
+- No Streamlit imports
+- No file access (state is passed in and returned)
+"""
+
+
+OPEN_STAY_COLUMNS = ["key", "station", "entered_at", "censored"]
+STAY_COLUMNS = ["key", "station", "entered_at", "left_at", "dwell_hours", "censored"]
+
+PERCENTILES = [50, 75, 90]
+RECENT_WEEKS = 4
+
+
+def empty_open_stays() -> pd.DataFrame:
+    return pd.DataFrame({
+        "key": pd.Series(dtype="str"),
+        "station": pd.Series(dtype="str"),
+        "entered_at": pd.Series(dtype="datetime64[us, UTC]"),
+        "censored": pd.Series(dtype="bool"),
+    })
+
+
+def empty_stays() -> pd.DataFrame:
+    stays = empty_open_stays()
+    stays.insert(3, "left_at", pd.Series(dtype="datetime64[us, UTC]"))
+    stays.insert(4, "dwell_hours", pd.Series(dtype="float64"))
+    return stays[STAY_COLUMNS]
+
+
+def _text(series: pd.Series) -> pd.Series:
+    # Missing values become "", not the text "nan" or "<NA>".
+    return series.astype("str").where(series.notna().to_numpy(), "")
+
+
+def _as_utc(value) -> pd.Timestamp:
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        return value.tz_localize("UTC")
+    return value.tz_convert("UTC")
+
+
+# -----------------------------
+# POSITIONS
+# -----------------------------
+def spool_positions(spools: pd.DataFrame) -> pd.DataFrame:
+    """
+    key -> station of the active spools of one export.
+
+    The key is the spool id. A spool without an id (an export without
+    order ids) is keyed by its workbook and name, so same-named spools of
+    different workbooks stay apart; one without a name is left out. A key
+    listed twice keeps its first row.
+    """
+    key = _text(spools["id"])
+    if "name" in spools.columns:
+        name = _text(spools["name"])
+        workbook = _text(spools["var_ISOworkbookId"]) if "var_ISOworkbookId" in spools.columns else ""
+        key = key.where(key != "", (workbook + "|" + name).where(name != "", ""))
+
+    station = spools["class_Station"].astype("str")
+    on_floor = (
+        ~spools["archived"].astype(bool).to_numpy()
+        & station.isin(STATIONS).to_numpy()
+        & (key != "").to_numpy()
+    )
+
+    positions = pd.DataFrame({
+        "key": key.to_numpy()[on_floor],
+        "station": station.to_numpy()[on_floor],
+    })
+    return positions.drop_duplicates("key", keep="first").reset_index(drop=True)
+
+
+@stage()
+def advance(open_stays: pd.DataFrame, positions: pd.DataFrame, at, first: bool = False):
+    """
+    Move the open stays to the export taken at time at.
+
+    Returns (open stays after the export, stays closed by the export).
+    first marks the very first export: its stays start censored.
+    """
+    at = _as_utc(at)
+
+    merged = open_stays.merge(
+        positions.rename(columns={"station": "station_now"}),
+        on="key",
+        how="outer",
+    )
+    was_open = merged["station"].notna().to_numpy()
+    is_there = merged["station_now"].notna().to_numpy()
+    same = was_open & is_there & (merged["station"].to_numpy() == merged["station_now"].to_numpy())
+
+    left = merged.loc[was_open & ~same, ["key", "station", "entered_at", "censored"]]
+    closed = left.assign(left_at=at)
+    closed["left_at"] = closed["left_at"].astype("datetime64[us, UTC]")
+    closed["dwell_hours"] = (
+        (closed["left_at"] - closed["entered_at"]).dt.total_seconds() / 3600
+    ).astype("float64")
+
+    kept = merged.loc[same, OPEN_STAY_COLUMNS]
+    entered = pd.DataFrame({
+        "key": merged.loc[is_there & ~same, "key"].to_numpy(),
+        "station": merged.loc[is_there & ~same, "station_now"].to_numpy(),
+        "entered_at": at,
+        "censored": first,
+    })
+
+    updated = pd.concat([kept, entered], ignore_index=True)
+    updated = updated.astype({
+        "key": "str",
+        "station": "str",
+        "entered_at": "datetime64[us, UTC]",
+        "censored": "bool",
+    })
+
+    if closed.empty:
+        closed = empty_stays()
+    return updated.reset_index(drop=True), closed[STAY_COLUMNS].reset_index(drop=True)
+
+
+# -----------------------------
+# STATISTICS
+# -----------------------------
+def _station_percentiles(values: pd.Series, stations: pd.Series, prefix: str) -> pd.DataFrame:
+    columns = [f"{prefix}_p{percentile}" for percentile in PERCENTILES]
+    if values.empty:
+        return pd.DataFrame(columns=columns, dtype="float64")
+
+    quantiles = values.groupby(stations.to_numpy()).quantile([p / 100 for p in PERCENTILES]).unstack()
+    quantiles.columns = columns
+    return quantiles
+
+
+@stage()
+def station_flow_summary(open_stays: pd.DataFrame, stays: pd.DataFrame, now, recent_weeks: int = RECENT_WEEKS) -> pd.DataFrame:
+    """
+    One row per station (STATIONS order):
+    - wip, and age percentiles (days) of the spools there now
+    - completed stays and dwell percentiles (days), censored stays excluded
+    - arrivals / departures in the last recent_weeks weeks
+    """
+    now = _as_utc(now)
+    recent_since = now - pd.Timedelta(weeks=recent_weeks)
+
+    summary = pd.DataFrame(index=pd.Index(STATIONS, name="station"))
+
+    summary["wip"] = open_stays["station"].value_counts()
+    ages = (now - open_stays["entered_at"]).dt.total_seconds() / 86400
+    summary = summary.join(_station_percentiles(ages, open_stays["station"], "wip_age_days"))
+
+    measured = stays[~stays["censored"].to_numpy()]
+    summary["completed"] = measured["station"].value_counts()
+    summary = summary.join(_station_percentiles(measured["dwell_hours"] / 24, measured["station"], "dwell_days"))
+
+    entered_at = pd.concat([stays["entered_at"], open_stays["entered_at"]], ignore_index=True)
+    entered_station = pd.concat([stays["station"], open_stays["station"]], ignore_index=True)
+    # Censored stays did not arrive in the window, they were already there.
+    entered_censored = pd.concat([stays["censored"], open_stays["censored"]], ignore_index=True)
+    arrived = (entered_at >= recent_since).to_numpy() & ~entered_censored.to_numpy(dtype=bool)
+    summary["arrivals"] = entered_station[arrived].value_counts()
+    summary["departures"] = stays.loc[(stays["left_at"] >= recent_since).to_numpy(), "station"].value_counts()
+
+    for column in ["wip", "completed", "arrivals", "departures"]:
+        summary[column] = summary[column].fillna(0).astype(int)
+    summary["net_flow"] = summary["arrivals"] - summary["departures"]
+
+    return summary.reset_index()
+
+
+def weekly_throughput(stays: pd.DataFrame) -> pd.DataFrame:
+    """Departures per ISO week (rows) and station (columns, STATIONS order)."""
+    if stays.empty:
+        return pd.DataFrame(columns=STATIONS, dtype="int64")
+
+    iso = stays["left_at"].dt.isocalendar()
+    week = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+
+    table = pd.crosstab(week.to_numpy(), stays["station"].to_numpy())
+    table.index.name = "week"
+    table.columns.name = "station"
+    return table.reindex(columns=[station for station in STATIONS if station in table.columns]).astype(np.int64)
@@ -0,0 +1,203 @@
+import pandas as pd
+
+from data.loader import CANCELLED_STATES, CLOSED_STATES, DUPLICATE_ISSUE_COLUMNS, OPEN_STATES
+from logic.operations1_checks import CHECK_COLUMNS, OPEN_GROUPS, normalize_status_group
+"""
+TESTS - Reference implementations
+
+Row-by-row versions of vectorized checks, kept as the specification the
+vectorized code is compared against. Slow on purpose; never used by the app.
+"""
+
+
+# -----------------------------
+# DUPLICATE ISSUES (data.loader._build_duplicate_issues)
+# -----------------------------
+def _format_values(series: pd.Series) -> str:
+    values = sorted(
+        value for value in series.dropna().astype(str).str.strip().unique() if value
+    )
+    return ", ".join(values)
+
+
+def build_duplicate_issues_loop(active_df: pd.DataFrame) -> pd.DataFrame:
+    rows = []
+    spool_rows = active_df[active_df["var_ISOworkbookId"].ne("")]
+
+    for sheet_no, group in spool_rows.groupby("var_ISOworkbookId", dropna=False):
+        if len(group) <= 1:
+            continue
+
+        open_rows = group[group["state"].isin(OPEN_STATES)]
+        cancelled_rows = group[group["state"].isin(CANCELLED_STATES)]
+        closed_rows = group[group["state"].isin(CLOSED_STATES)]
+        history_rows = pd.concat([cancelled_rows, closed_rows])
+
+        open_revisions = sorted(
+            rev for rev in open_rows["var_ex_internal_rev"].dropna().astype(str).unique() if rev
+        )
+
+        if len(open_rows) > 1 and len(open_revisions) > 1:
+            severity = "High"
+            issue = "Multiple open revisions"
+            action = "Problem: more than one revision is still active/open."
+        elif len(open_rows) > 1:
+            severity = "High"
+            issue = "Same revision open more than once"
+            action = "Problem: duplicate open rows exist for the same revision."
+        elif len(open_rows) == 1 and not history_rows.empty:
+            severity = "Medium"
+            issue = "Open row with cancelled/closed older version"
+            action = "Review: usually acceptable when the older revision is cancelled/closed."
+        elif len(open_rows) == 1:
+            severity = "Medium"
+            issue = "Single open row with duplicate history"
+            action = "Review duplicate history for this workbook."
+        else:
+            severity = "Low"
+            issue = "Only cancelled/closed duplicate history"
+            action = "Usually OK: no open duplicate rows remain."
+
+        rows.append({
+            "severity": severity,
+            "issue": issue,
+            "var_ISOworkbookId": sheet_no,
+            "revisions": _format_values(group["var_ex_internal_rev"]),
+            "open_revisions": ", ".join(open_revisions),
+            "states": _format_values(group["state"]),
+            "stations": _format_values(group["class_Station"]),
+            "row_count": len(group),
+            "open_count": len(open_rows),
+            "cancelled_count": len(cancelled_rows),
+            "closed_count": len(closed_rows),
+            "action": action,
+        })
+
+    if not rows:
+        return pd.DataFrame(columns=DUPLICATE_ISSUE_COLUMNS)
+
+    severity_order = {"High": 0, "Medium": 1, "Low": 2}
+    result = pd.DataFrame(rows)
+    result["_severity_order"] = result["severity"].map(severity_order).fillna(9)
+    return result.sort_values(["_severity_order", "var_ISOworkbookId"]).drop(columns="_severity_order")
+
+
+# -----------------------------
+# OPERATIONS1 CHECKS (logic.operations1_checks.build_operations1_checks)
+# -----------------------------
+def _check_row(severity, category, check, sheet_no, revisions, statuses, stations, row_count, message):
+    return {
+        "severity": severity,
+        "category": category,
+        "check": check,
+        "sheet_no": sheet_no,
+        "revisions": revisions,
+        "statuses": statuses,
+        "stations": stations,
+        "row_count": row_count,
+        "message": message,
+    }
+
+
+def build_operations1_checks_loop(df: pd.DataFrame) -> pd.DataFrame:
+    normalized = df.copy()
+    normalized["state_group"] = normalized["state"].apply(normalize_status_group)
+    normalized["is_real_spool"] = normalized["var_ISOworkbookId"].fillna("").astype(str).str.strip().ne("")
+    rows = []
+
+    missing_sheet = normalized[~normalized["is_real_spool"]]
+    if not missing_sheet.empty:
+        rows.append(_check_row(
+            severity="High",
+            category="Identity",
+            check="Missing sheet number",
+            sheet_no="",
+            revisions="",
+            statuses=_format_values(missing_sheet["state"]),
+            stations=_format_values(missing_sheet["class_Station"]),
+            row_count=len(missing_sheet),
+            message="Rows without ISO/sheet number cannot be tracked as spools.",
+        ))
+
+    unknown_status = normalized[normalized["state_group"].eq("unknown")]
+    if not unknown_status.empty:
+        rows.append(_check_row(
+            severity="Medium",
+            category="Status",
+            check="Unknown status value",
+            sheet_no="",
+            revisions="",
+            statuses=_format_values(unknown_status["state"]),
+            stations="",
+            row_count=len(unknown_status),
+            message="Status is not in the normalized Operations1 status list.",
+        ))
+
+    spool_rows = normalized[normalized["is_real_spool"]].copy()
+
+    for (sheet_no, revision), group in spool_rows.groupby(
+        ["var_ISOworkbookId", "var_ex_internal_rev"], dropna=False
+    ):
+        open_rows = group[group["state_group"].isin(OPEN_GROUPS)]
+        if len(open_rows) > 1:
+            rows.append(_check_row(
+                severity="High",
+                category="Duplicate",
+                check="Same revision open more than once",
+                sheet_no=sheet_no,
+                revisions=revision,
+                statuses=_format_values(open_rows["state"]),
+                stations=_format_values(open_rows["class_Station"]),
+                row_count=len(open_rows),
+                message="Same sheet number and internal revision has multiple non-closed/non-cancelled rows.",
+            ))
+
+    for sheet_no, group in spool_rows.groupby("var_ISOworkbookId", dropna=False):
+        open_rows = group[group["state_group"].isin(OPEN_GROUPS)]
+        open_revisions = sorted(
+            rev for rev in open_rows["var_ex_internal_rev"].dropna().astype(str).unique() if rev
+        )
+        if len(open_revisions) > 1:
+            rows.append(_check_row(
+                severity="High",
+                category="Revision",
+                check="Multiple open revisions",
+                sheet_no=sheet_no,
+                revisions=", ".join(open_revisions),
+                statuses=_format_values(open_rows["state"]),
+                stations=_format_values(open_rows["class_Station"]),
+                row_count=len(open_rows),
+                message="Same sheet number has more than one internal revision still open.",
+            ))
+
+        if len(group) > 1 and open_rows.empty:
+            rows.append(_check_row(
+                severity="Info",
+                category="Duplicate",
+                check="Duplicate only in closed/cancelled rows",
+                sheet_no=sheet_no,
+                revisions=_format_values(group["var_ex_internal_rev"]),
+                statuses=_format_values(group["state"]),
+                stations=_format_values(group["class_Station"]),
+                row_count=len(group),
+                message="Repeated sheet number exists only in closed or cancelled rows.",
+            ))
+        elif len(group) > 1:
+            cancelled_or_closed = group[group["state_group"].isin({"cancelled", "closed"})]
+            if not cancelled_or_closed.empty:
+                rows.append(_check_row(
+                    severity="Info",
+                    category="Duplicate",
+                    check="Open row with closed/cancelled history",
+                    sheet_no=sheet_no,
+                    revisions=_format_values(group["var_ex_internal_rev"]),
+                    statuses=_format_values(group["state"]),
+                    stations=_format_values(group["class_Station"]),
+                    row_count=len(group),
+                    message="Sheet number repeats, but at least one row is closed or cancelled. Review only if unexpected.",
+                ))
+
+    if not rows:
+        return pd.DataFrame(columns=CHECK_COLUMNS)
+
+    return pd.DataFrame(rows)
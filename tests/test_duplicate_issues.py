@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.loader import _build_duplicate_issues, load_spools, read_spools, split_spools
+from tests.reference import build_duplicate_issues_loop
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SPOOLS = ROOT / "spools.xlsx"
+
+REVISIONS = ["001", "002", "", " ", "  002 ", None, np.nan]
+STATES = ["in-progress", "in-edit", "problem", "cancelled", "done", "completed", "unknown"]
+STATIONS = ["PPS", "Welding", " NDT ", "", None]
+
+
+def assert_same(active_df: pd.DataFrame) -> None:
+    expected = build_duplicate_issues_loop(active_df)
+    result = _build_duplicate_issues(active_df)
+
+    assert list(result.columns) == list(expected.columns)
+    if expected.empty:
+        assert result.empty
+        return
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def random_spools(seed: int, rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    workbooks = [f"WB{i:03d}" for i in range(rows // 4)] + [""]
+    return pd.DataFrame({
+        "var_ISOworkbookId": rng.choice(workbooks, rows),
+        "var_ex_internal_rev": pd.Series(REVISIONS, dtype=object).sample(rows, replace=True, random_state=seed).to_numpy(),
+        "state": rng.choice(STATES, rows),
+        "class_Station": pd.Series(STATIONS, dtype=object).sample(rows, replace=True, random_state=seed + 1).to_numpy(),
+    })
+
+
+@pytest.mark.skipif(not SPOOLS.exists(), reason="spools.xlsx not present")
+def test_matches_loop_on_spools_export():
+    active_df, _ = split_spools(read_spools(str(SPOOLS)))
+    assert_same(active_df)
+
+
+@pytest.mark.skipif(not SPOOLS.exists(), reason="spools.xlsx not present")
+def test_load_spools_duplicates_match_loop():
+    active_df, duplicates, _ = load_spools(str(SPOOLS))
+    pd.testing.assert_frame_equal(duplicates, build_duplicate_issues_loop(active_df), check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_loop_on_random_frames(seed):
+    assert_same(random_spools(seed))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_repeated_index_labels(seed):
+    df = random_spools(seed)
+    # Concatenated exports repeat labels; every label appears several times.
+    df.index = np.arange(len(df)) % 7
+    assert_same(df)
+
+
+def test_categorical_columns():
+    df = random_spools(99)
+    for column in ["state", "class_Station"]:
+        df[column] = df[column].astype("category")
+    assert_same(df)
+
+
+def test_blank_whitespace_and_missing_revisions():
+    df = pd.DataFrame({
+        "var_ISOworkbookId": ["A", "A", "A", "B", "B", "C", "C", "C"],
+        "var_ex_internal_rev": ["001", "", None, " ", np.nan, "002", " 002", "003"],
+        "state": ["in-progress", "in-edit", "cancelled", "problem", "in-progress", "in-progress", "in-progress", "done"],
+        "class_Station": ["PPS", "PPS", "", None, "NDT", "PPS", "Welding", "PPS"],
+    }, index=[0, 0, 1, 1, 2, 2, 3, 3])
+    assert_same(df)
+
+
+def test_no_duplicates():
+    df = pd.DataFrame({
+        "var_ISOworkbookId": ["A", "B", ""],
+        "var_ex_internal_rev": ["001", "001", "001"],
+        "state": ["in-progress", "done", "in-progress"],
+        "class_Station": ["PPS", "PPS", "PPS"],
+    })
+    assert_same(df)
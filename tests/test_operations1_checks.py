@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.loader import read_spools
+from logic.operations1_checks import build_operations1_checks
+from tests.reference import build_operations1_checks_loop
+
+
+ROOT = Path(__file__).resolve().parent.parent
+EXPORTS = ["spools.xlsx", "spools-backup.xlsx", "spools-backup-2.xlsx"]
+
+REVISIONS = ["001", "002", "", " ", "  002 ", None, np.nan]
+STATES = ["in-progress", "In-Edit ", "problem", "cancelled", "done", "completed", "unknown", "", None]
+STATIONS = ["PPS", "Welding", " NDT ", "", None]
+
+
+def assert_same(df: pd.DataFrame) -> None:
+    expected = build_operations1_checks_loop(df)
+    result = build_operations1_checks(df)
+
+    assert list(result.columns) == list(expected.columns)
+    if expected.empty:
+        assert result.empty
+        return
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def random_spools(seed: int, rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    workbooks = [f"WB{i:03d}" for i in range(rows // 4)] + ["", " ", None]
+    return pd.DataFrame({
+        "var_ISOworkbookId": pd.Series(workbooks, dtype=object).sample(rows, replace=True, random_state=seed).to_numpy(),
+        "var_ex_internal_rev": pd.Series(REVISIONS, dtype=object).sample(rows, replace=True, random_state=seed + 1).to_numpy(),
+        "state": pd.Series(STATES, dtype=object).sample(rows, replace=True, random_state=seed + 2).to_numpy(),
+        "class_Station": pd.Series(STATIONS, dtype=object).sample(rows, replace=True, random_state=seed + 3).to_numpy(),
+        "start_date": pd.Timestamp("2026-04-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D"),
+    })
+
+
+@pytest.mark.parametrize("export", EXPORTS)
+def test_matches_loop_on_exports(export):
+    path = ROOT / export
+    if not path.exists():
+        pytest.skip(f"{export} not present")
+    # read_spools stores state and class_Station as Categoricals.
+    df = read_spools(str(path))
+    assert_same(df)
+
+    for column in ["state", "class_Station"]:
+        df[column] = df[column].astype(object)
+    assert_same(df)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_matches_loop_on_random_frames(seed):
+    assert_same(random_spools(seed))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_repeated_index_labels(seed):
+    df = random_spools(seed)
+    # Concatenated exports repeat labels; every label appears several times.
+    df.index = np.arange(len(df)) % 7
+    assert_same(df)
+
+
+def test_categorical_columns():
+    df = random_spools(99)
+    for column in ["state", "class_Station", "var_ex_internal_rev"]:
+        df[column] = df[column].astype("category")
+    assert_same(df)
+
+
+def test_every_check():
+    df = pd.DataFrame({
+        "var_ISOworkbookId": ["", "A", "A", "B", "B", "C", "C", "D", "D"],
+        "var_ex_internal_rev": ["001", "001", "001", "001", "002", "001", "002", "001", "002"],
+        "state": ["in-progress", "in-progress", "bogus", "in-edit", "paused", "done", "cancelled", "in-progress", "done"],
+        "class_Station": ["PPS", "PPS", "NDT", "", None, "PPS", "PPS", "Welding", "PPS"],
+        "start_date": pd.Timestamp("2026-04-01"),
+    })
+    assert_same(df)
+
+    assert set(build_operations1_checks(df)["check"]) == {
+        "Missing sheet number",
+        "Unknown status value",
+        "Same revision open more than once",
+        "Multiple open revisions",
+        "Duplicate only in closed/cancelled rows",
+        "Open row with closed/cancelled history",
+    }
+
+
+def test_no_checks():
+    df = pd.DataFrame({
+        "var_ISOworkbookId": ["A", "B"],
+        "var_ex_internal_rev": ["001", "001"],
+        "state": ["in-progress", "done"],
+        "class_Station": ["PPS", "PPS"],
+        "start_date": pd.Timestamp("2026-04-01"),
+    })
+    assert_same(df)
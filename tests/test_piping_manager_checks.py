@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logic.piping_manager_checks import (
+    PM_INPUT_COLUMNS,
+    add_piping_manager_columns,
+    evaluate_piping_manager_checks,
+    evaluate_piping_manager_row,
+)
+
+
+STATES = ["", "5", "15", "16", "2", " 2 ", "7", "16 "]
+STATIONS = ["Work Preparation", "PPS", "Welding", "", " Work Preparation "]
+WEEKS = ["2026-W14", "2026-W15", "No start date", ""]
+
+
+def assert_same(df: pd.DataFrame) -> None:
+    expected = df.apply(evaluate_piping_manager_row, axis=1, result_type="expand")
+    result = evaluate_piping_manager_checks(df)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def all_combinations() -> pd.DataFrame:
+    # Every state with every station and every (start week, AV week) pair:
+    # AV week missing, equal and different.
+    return pd.DataFrame(
+        list(itertools.product(STATES, STATIONS, WEEKS, WEEKS)),
+        columns=PM_INPUT_COLUMNS,
+    )
+
+
+def test_all_rule_branches():
+    df = all_combinations()
+    assert_same(df)
+
+    checks = set(evaluate_piping_manager_checks(df)[2])
+    assert {
+        "Missing in Piping Manager",
+        "Part list on hold",
+        "Missing AV READY KW",
+        "Material tested/reserved - AV week OK",
+        "AV week mismatch",
+        "Fully planned but still in Work Preparation",
+        "Fully planned - station OK",
+        "No PM rule for this state",
+    } <= checks
+
+
+@pytest.mark.parametrize("state", ["15", "16"])
+def test_av_week_missing_equal_and_different(state):
+    df = pd.DataFrame({
+        "pm_part_list_state": [state] * 4,
+        "class_Station": ["PPS"] * 4,
+        "start_year_week": ["2026-W14", "2026-W14", "2026-W14", "No start date"],
+        "pm_av_ready_week": ["", "2026-W14", "2026-W15", "No start date"],
+    })
+    assert_same(df)
+    assert list(evaluate_piping_manager_checks(df)[1]) == [
+        "AV Week Missing", "OK", "AV Week Mismatch", "AV Week Mismatch",
+    ]
+
+
+def test_categorical_inputs():
+    df = all_combinations()
+    for column in ["class_Station", "start_year_week"]:
+        df[column] = df[column].astype("category")
+    assert_same(df)
+
+
+def test_missing_spool_values():
+    df = all_combinations()
+    df.loc[::3, "class_Station"] = np.nan
+    df.loc[::5, "start_year_week"] = np.nan
+    df["class_Station"] = df["class_Station"].astype(object)
+    assert_same(df)
+
+
+def test_missing_columns():
+    df = all_combinations().drop(columns=["class_Station", "start_year_week"])
+    assert_same(df)
+
+
+def test_through_add_piping_manager_columns():
+    spools = pd.DataFrame({
+        "var_ISOworkbookId": ["A", "B", "C", "D", "E"],
+        "class_Station": pd.Categorical(["Work Preparation", "PPS", "PPS", "Welding", "PPS"]),
+        "start_year_week": ["2026-W14", "2026-W14", "2026-W15", "No start date", "2026-W14"],
+    })
+    pm_df = pd.DataFrame({
+        "var_ISOworkbookId": ["A", "B", "C", "D"],
+        "pm_part_list_state": ["2", "15", "16", "5"],
+        "pm_av_ready_week": ["", "2026-W14", "", "2026-W14"],
+    })
+    result = add_piping_manager_columns(spools, pm_df)
+
+    expected = result.apply(evaluate_piping_manager_row, axis=1, result_type="expand")
+    for position, column in enumerate(["pm_check_severity", "pm_check_category", "pm_check", "pm_action"]):
+        assert result[column].tolist() == expected[position].tolist()
+    assert result["pm_check_category"].tolist() == [
+        "Status/Station", "OK", "AV Week Missing", "PM Hold", "Missing in PM",
+    ]
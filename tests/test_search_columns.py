@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from data.loader import SEARCH_COLUMN_ALIASES, read_spools
+from data.search_index import apply_search
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# spools.xlsx has plain headers (isometric, spool, ...), the backups the
+# var_ prefixed ones (var_isometric, var_spool, ...).
+EXPORTS = ["spools.xlsx", "spools-backup.xlsx"]
+TERMS_PER_COLUMN = 8
+
+
+def search_terms(full: pd.DataFrame) -> list:
+    """A few values of every searched export column, as typed by a user."""
+    terms = []
+    for column in full.columns:
+        if column.removeprefix("var_") not in SEARCH_COLUMN_ALIASES:
+            continue
+        values = full[column].dropna().astype(str).str.split().str[0].dropna()
+        values = values[values.str.len() >= 3].drop_duplicates()
+        terms += values.sample(min(TERMS_PER_COLUMN, len(values)), random_state=0).tolist()
+    return terms
+
+
+@pytest.mark.parametrize("export", EXPORTS)
+def test_search_matches_full_read(export):
+    path = ROOT / export
+    projected = read_spools(path)
+    # Every column of the export, for the rows read_spools keeps.
+    full = pd.read_excel(path).loc[projected.index]
+
+    terms = search_terms(full)
+    assert len(terms) >= len(SEARCH_COLUMN_ALIASES)
+
+    for term in terms:
+        assert len(apply_search(projected, term)) == len(apply_search(full, term)), term
+
+
+@pytest.mark.parametrize("export", EXPORTS)
+def test_search_columns_keep_export_headers(export):
+    headers = set(pd.read_excel(ROOT / export, nrows=0).columns)
+    projected = read_spools(ROOT / export)
+
+    for canonical, names in SEARCH_COLUMN_ALIASES.items():
+        present = headers.intersection(names)
+        assert present and present <= set(projected.columns), canonical
@@ -0,0 +1,63 @@
+import pandas as pd
+import streamlit as st
+
+from instrumentation import stages
+
+
+STAGE_COLUMNS = ["stage", "wall_ms", "rows_in", "rows_out", "peak_kib"]
+
+
+def render_debug_panel(run, cache_stats=None):
+    """
+    Sidebar panel with the stage timings of the finished rerun and the
+    counters of the shared result cache (data.result_cache stats()).
+    Only shown when instrumentation is enabled.
+    """
+    if run is None:
+        return
+
+    with st.sidebar.expander("⏱ Performance", expanded=False):
+        col1, col2 = st.columns(2)
+        col1.metric("Rerun", f"{run['wall_ms']:.0f} ms")
+        if run["peak_kib"] is not None:
+            col2.metric("Peak memory", f"{run['peak_kib'] / 1024:.1f} MiB")
+
+        table = pd.DataFrame(run["stages"]).reindex(columns=STAGE_COLUMNS + ["depth"])
+        if table.empty:
+            st.caption("No stages ran in this rerun (all data served from cache).")
+        else:
+            table["stage"] = [
+                "  " * int(depth) + str(name)
+                for name, depth in zip(table["stage"], table["depth"].fillna(0))
+            ]
+            table["rows_out"] = table["rows_out"].map(
+                lambda rows: ", ".join(map(str, rows)) if isinstance(rows, list)
+                else "" if rows is None or rows != rows
+                else str(rows)
+            )
+            st.dataframe(table[STAGE_COLUMNS], hide_index=True, use_container_width=True)
+
+        history = stages.history()
+        if len(history) > 1:
+            st.caption(f"Last {len(history)} reruns (ms)")
+            st.line_chart(
+                pd.DataFrame({"wall_ms": [previous["wall_ms"] for previous in history]}),
+                height=120,
+            )
+
+        if cache_stats is not None:
+            st.caption("Shared result cache")
+            col1, col2, col3 = st.columns(3)
+            col1.metric(
+                "Hit rate",
+                "–" if cache_stats["hit_rate"] is None else f"{cache_stats['hit_rate']:.0%}",
+            )
+            col2.metric(
+                "Memory",
+                f"{cache_stats['bytes'] / 2**20:.0f} / {cache_stats['max_bytes'] / 2**20:.0f} MiB",
+            )
+            col3.metric("Entries", cache_stats["entries"])
+            st.caption(
+                f"{cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                f"{cache_stats['evictions']} evictions"
+            )
@@ -2,10 +2,12 @@
 from logic.inspection_graph import build_inspection_graph
 
 from ui.inspection_cytoscape import render_inspection_cytoscape
+from instrumentation.stages import stage
 
 import streamlit as st
 
 
+@stage()
 def render_inspection(spools_df):
     st.subheader("🔍 Inspection – Flow Overview")
     st.success("Inspection view loaded")
@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+
+from data.result_cache import results
+from logic.station_flow import PERCENTILES, RECENT_WEEKS, station_flow_summary, weekly_throughput
+from instrumentation.stages import stage
+
+import streamlit as st
+
+
+THROUGHPUT_WEEKS = 12
+
+
+def _read_flow(flow, updated_at):
+    # The stays files only change when an export is applied, so they are
+    # read once per (flow directory, last export) for every session.
+    return results.get_or_compute(
+        ("station_flow", str(flow.directory), updated_at),
+        "station_flow_stays",
+        (),
+        lambda: (flow.open_stays(), flow.stays()),
+    )
+
+
+@stage()
+def render_station_flow(flow):
+    st.subheader("⏳ Station Flow – Dwell Times and WIP")
+
+    updated_at = None if flow is None else flow.updated_at
+    if updated_at is None:
+        st.info("No station history yet. It is collected from every new spools export.")
+        return
+
+    now = datetime.now(timezone.utc)
+    open_stays, stays = _read_flow(flow, updated_at)
+    summary = station_flow_summary(open_stays, stays, now)
+
+    st.caption(
+        f"Last export {updated_at:%Y-%m-%d %H:%M} UTC. "
+        "Dwell times are measured between exports; spools already at a station "
+        "in the first export are not counted."
+    )
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("WIP on the floor", int(summary["wip"].sum()))
+    col2.metric("Completed stays", int(summary["completed"].sum()))
+    busiest = summary.sort_values("net_flow", ascending=False, kind="mergesort").iloc[0]
+    col3.metric(
+        f"Largest WIP growth ({RECENT_WEEKS} weeks)",
+        busiest["station"] if busiest["net_flow"] > 0 else "–",
+        f"{int(busiest['net_flow']):+d}" if busiest["net_flow"] > 0 else None,
+        delta_color="inverse",
+    )
+
+    st.dataframe(
+        summary,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "station": "Station",
+            "wip": "WIP",
+            "completed": "Completed",
+            "arrivals": f"In ({RECENT_WEEKS}w)",
+            "departures": f"Out ({RECENT_WEEKS}w)",
+            "net_flow": "Net",
+            **{
+                f"{prefix}_p{percentile}": st.column_config.NumberColumn(
+                    f"{label} P{percentile}",
+                    format="%.1f d",
+                )
+                for prefix, label in [("dwell_days", "Dwell"), ("wip_age_days", "WIP age")]
+                for percentile in PERCENTILES
+            },
+        },
+    )
+
+    st.markdown("**WIP per station**")
+    st.bar_chart(summary.set_index("station")["wip"], height=240)
+
+    throughput = weekly_throughput(stays).tail(THROUGHPUT_WEEKS)
+    st.markdown(f"**Spools leaving each station per week (last {THROUGHPUT_WEEKS} weeks)**")
+    if throughput.empty:
+        st.caption("No station has finished a spool yet.")
+    else:
+        st.dataframe(throughput, use_container_width=True)